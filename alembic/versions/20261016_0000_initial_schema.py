@@ -0,0 +1,321 @@
+"""initial schema (tables as created by create_all before the 0001 series)
+
+Revision ID: 0000_initial_schema
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0000_initial_schema"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _enum(name: str, *values: str) -> postgresql.ENUM:
+    # Types are created once up front (several are shared between tables)
+    return postgresql.ENUM(*values, name=name, create_type=False)
+
+
+_USER_ROLE = _enum("userrole", "ADMIN", "MANAGER", "STAFF")
+_USER_STATUS = _enum("userstatus", "ACTIVE", "INACTIVE", "SUSPENDED")
+_PRODUCT_CATEGORY = _enum(
+    "productcategory",
+    "OUR_CHOCOLATE", "CHOCOLATE_INGREDIENTS", "CHINESE_TEA", "BEVERAGES_COFFEE",
+    "SHOP_MERCHANDISE", "HOUSEHOLD_ITEMS", "CHOCOLATE_PACKAGING", "OTHER_PACKAGING",
+    "PRINTING_MATERIALS", "AI_EXPENSES", "EQUIPMENT_MATERIALS",
+)
+_INGREDIENT_CATEGORY = _enum(
+    "ingredientcategory",
+    "CACAO_BASE", "NUTS_SEEDS", "DAIRY_ALT", "COFFEE", "TEA", "PACKAGING", "SPICES", "OTHER",
+)
+_INGREDIENT_UNIT = _enum("ingredientunit", "kg", "L", "pc", "btl")
+_SALE_SOURCE = _enum("salesource", "TELEGRAM_BOT", "SQUARE_POS", "MANUAL")
+_PAYMENT_METHOD = _enum("paymentmethod", "CASH", "CARD", "BANK_TRANSFER", "CRYPTO", "OTHER")
+_PRODUCTION_STATUS = _enum("productionstatus", "PLANNED", "IN_PROGRESS", "COMPLETED", "CANCELLED")
+_PURCHASE_STATUS = _enum("purchasestatus", "ORDERED", "RECEIVED", "CANCELLED")
+_SYNC_TYPE = _enum("synctype", "INVENTORY", "SALES", "PRODUCTS", "FULL")
+_SYNC_STATUS = _enum("syncstatus", "SUCCESS", "FAILED", "IN_PROGRESS")
+_ACTION_TYPE = _enum(
+    "actiontype",
+    "CREATE", "UPDATE", "DELETE", "SALE", "PRODUCTION", "PURCHASE", "INVENTORY_ADJUST", "SYNC",
+)
+_TRANSACTION_ACTION_TYPE = _enum("transactionactiontype", "ADD", "CONSUME", "CORRECTION")
+
+_ENUMS = (
+    _USER_ROLE, _USER_STATUS, _PRODUCT_CATEGORY, _INGREDIENT_CATEGORY, _INGREDIENT_UNIT,
+    _SALE_SOURCE, _PAYMENT_METHOD, _PRODUCTION_STATUS, _PURCHASE_STATUS, _SYNC_TYPE,
+    _SYNC_STATUS, _ACTION_TYPE, _TRANSACTION_ACTION_TYPE,
+)
+
+# Creation order (reverse for downgrade)
+_TABLES = (
+    "users", "role_permissions", "products", "ingredients", "inventory_products",
+    "inventory_ingredients", "sales", "production", "production_ingredients_used",
+    "purchases", "square_sync_log", "sheets_sync_log", "audit_log", "transaction_logs",
+)
+
+
+def _id() -> sa.Column:
+    return sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True)
+
+
+def _created_at(**kwargs) -> sa.Column:
+    return sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), **kwargs)
+
+
+def _updated_at() -> sa.Column:
+    return sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for enum in _ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.create_table(
+        "users",
+        _id(),
+        sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("username", sa.String(255)),
+        sa.Column("first_name", sa.String(255)),
+        sa.Column("last_name", sa.String(255)),
+        sa.Column("role", _USER_ROLE, nullable=False),
+        sa.Column("status", _USER_STATUS, nullable=False),
+        sa.Column("is_admin", sa.Boolean()),
+        _created_at(),
+        _updated_at(),
+        sa.Column("last_login", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    op.create_table(
+        "role_permissions",
+        sa.Column("role", _USER_ROLE, primary_key=True),
+        sa.Column("permissions", postgresql.JSONB(), nullable=False),
+        _created_at(),
+    )
+
+    op.create_table(
+        "products",
+        _id(),
+        sa.Column("sku", sa.String(50), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("category", _PRODUCT_CATEGORY, nullable=False),
+        sa.Column("weight_g", sa.DECIMAL(8, 2)),
+        sa.Column("cocoa_percent", sa.String(20)),
+        sa.Column("retail_price_thb", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("cogs_thb", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("square_item_id", sa.String(255)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("notes", sa.Text()),
+        sa.Column("grammovka", sa.Integer()),
+        sa.Column("unit_type", sa.String(50)),
+        sa.Column("quantity_per_package", sa.Integer()),
+        _created_at(),
+        _updated_at(),
+    )
+    op.create_index("ix_products_sku", "products", ["sku"], unique=True)
+    op.create_index("ix_products_category", "products", ["category"])
+
+    op.create_table(
+        "ingredients",
+        _id(),
+        sa.Column("code", sa.String(50), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("category", _INGREDIENT_CATEGORY, nullable=False),
+        sa.Column("price_per_unit_thb", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("unit", _INGREDIENT_UNIT, nullable=False),
+        sa.Column("supplier", sa.String(255)),
+        sa.Column("notes", sa.Text()),
+        sa.Column("is_active", sa.Boolean()),
+        _created_at(),
+        _updated_at(),
+    )
+    op.create_index("ix_ingredients_code", "ingredients", ["code"], unique=True)
+
+    op.create_table(
+        "inventory_products",
+        _id(),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("products.id", ondelete="CASCADE")),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("min_stock_level", sa.Integer()),
+        sa.Column("max_stock_level", sa.Integer()),
+        sa.Column("location", sa.String(255)),
+        sa.Column("last_count_at", sa.DateTime(timezone=True)),
+        _updated_at(),
+        sa.CheckConstraint("quantity >= 0", name="positive_quantity"),
+    )
+
+    op.create_table(
+        "inventory_ingredients",
+        _id(),
+        sa.Column("ingredient_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("ingredients.id", ondelete="CASCADE")),
+        sa.Column("quantity_kg", sa.DECIMAL(12, 3), nullable=False),
+        sa.Column("min_stock_level_kg", sa.DECIMAL(12, 3)),
+        sa.Column("max_stock_level_kg", sa.DECIMAL(12, 3)),
+        sa.Column("location", sa.String(255)),
+        sa.Column("expiry_date", sa.Date()),
+        sa.Column("last_count_at", sa.DateTime(timezone=True)),
+        _updated_at(),
+        sa.CheckConstraint("quantity_kg >= 0", name="positive_quantity_ing"),
+    )
+
+    op.create_table(
+        "sales",
+        _id(),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("products.id", ondelete="RESTRICT")),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unit_price_thb", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("discount_thb", sa.DECIMAL(10, 2)),
+        sa.Column("final_price_thb", sa.DECIMAL(10, 2)),
+        sa.Column("source", _SALE_SOURCE, nullable=False),
+        sa.Column("payment_method", _PAYMENT_METHOD),
+        sa.Column("square_transaction_id", sa.String(255)),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("customer_name", sa.String(255)),
+        sa.Column("customer_telegram_id", sa.BigInteger()),
+        sa.Column("notes", sa.Text()),
+        _created_at(),
+        sa.CheckConstraint("quantity > 0", name="positive_quantity_sale"),
+    )
+    op.create_index("ix_sales_created_at", "sales", ["created_at"])
+
+    op.create_table(
+        "production",
+        _id(),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("products.id", ondelete="RESTRICT")),
+        sa.Column("batch_number", sa.String(100), unique=True),
+        sa.Column("quantity_produced", sa.Integer(), nullable=False),
+        sa.Column("production_date", sa.Date(), nullable=False,
+                  server_default=sa.func.current_date()),
+        sa.Column("status", _PRODUCTION_STATUS, nullable=False),
+        sa.Column("cost_materials_thb", sa.DECIMAL(10, 2)),
+        sa.Column("cost_labor_thb", sa.DECIMAL(10, 2)),
+        sa.Column("total_cost_thb", sa.DECIMAL(10, 2)),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("notes", sa.Text()),
+        _created_at(),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+        sa.CheckConstraint("quantity_produced > 0", name="positive_quantity_prod"),
+    )
+    op.create_index("ix_production_status", "production", ["status"])
+
+    op.create_table(
+        "production_ingredients_used",
+        _id(),
+        sa.Column("production_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("production.id", ondelete="CASCADE")),
+        sa.Column("ingredient_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("ingredients.id", ondelete="RESTRICT")),
+        sa.Column("quantity_used_kg", sa.DECIMAL(12, 3), nullable=False),
+        sa.Column("cost_thb", sa.DECIMAL(10, 2)),
+        _created_at(),
+    )
+
+    op.create_table(
+        "purchases",
+        _id(),
+        sa.Column("ingredient_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("ingredients.id", ondelete="RESTRICT")),
+        sa.Column("quantity_kg", sa.DECIMAL(12, 3), nullable=False),
+        sa.Column("unit_price_thb", sa.DECIMAL(10, 2), nullable=False),
+        sa.Column("supplier", sa.String(255)),
+        sa.Column("purchase_date", sa.Date(), nullable=False,
+                  server_default=sa.func.current_date()),
+        sa.Column("expected_delivery_date", sa.Date()),
+        sa.Column("status", _PURCHASE_STATUS, nullable=False),
+        sa.Column("invoice_number", sa.String(100)),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("notes", sa.Text()),
+        _created_at(),
+        sa.Column("received_at", sa.DateTime(timezone=True)),
+        sa.CheckConstraint("quantity_kg > 0", name="positive_quantity_purch"),
+    )
+    op.create_index("ix_purchases_status", "purchases", ["status"])
+
+    op.create_table(
+        "square_sync_log",
+        _id(),
+        sa.Column("sync_type", _SYNC_TYPE, nullable=False),
+        sa.Column("sync_status", _SYNC_STATUS, nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+        sa.Column("records_synced", sa.Integer()),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("triggered_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+    )
+
+    op.create_table(
+        "sheets_sync_log",
+        _id(),
+        sa.Column("sheet_name", sa.String(255), nullable=False),
+        sa.Column("sync_direction", sa.String(20)),
+        sa.Column("sync_status", _SYNC_STATUS, nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+        sa.Column("records_synced", sa.Integer()),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("triggered_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+    )
+
+    op.create_table(
+        "audit_log",
+        _id(),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+        sa.Column("action", _ACTION_TYPE, nullable=False),
+        sa.Column("table_name", sa.String(100), nullable=False),
+        sa.Column("record_id", postgresql.UUID(as_uuid=True)),
+        sa.Column("old_data", postgresql.JSONB()),
+        sa.Column("new_data", postgresql.JSONB()),
+        sa.Column("ip_address", postgresql.INET()),
+        _created_at(),
+    )
+    op.create_index("ix_audit_log_user_id", "audit_log", ["user_id"])
+    op.create_index("ix_audit_log_created_at", "audit_log", ["created_at"])
+
+    op.create_table(
+        "transaction_logs",
+        _id(),
+        sa.Column("telegram_user_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_name", sa.String(255), nullable=False),
+        sa.Column("product_id", postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey("products.id", ondelete="RESTRICT"), nullable=False),
+        sa.Column("product_name", sa.String(255), nullable=False),
+        sa.Column("category", _PRODUCT_CATEGORY, nullable=False),
+        sa.Column("action_type", _TRANSACTION_ACTION_TYPE, nullable=False),
+        sa.Column("quantity_original", sa.Float(), nullable=False),
+        sa.Column("quantity_unit", sa.String(50), nullable=False),
+        sa.Column("quantity_grams", sa.Integer(), nullable=False),
+        sa.Column("quantity_display", sa.String(100)),
+        sa.Column("notes", sa.Text()),
+        sa.Column("source", sa.String(50)),
+        sa.Column("admin_flag", sa.Boolean()),
+        _created_at(),
+        _updated_at(),
+    )
+    op.create_index("ix_transaction_logs_telegram_user_id", "transaction_logs", ["telegram_user_id"])
+    op.create_index("ix_transaction_logs_product_id", "transaction_logs", ["product_id"])
+    op.create_index("ix_transaction_logs_action_type", "transaction_logs", ["action_type"])
+    op.create_index("ix_transaction_logs_created_at", "transaction_logs", ["created_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(_TABLES):
+        op.drop_table(table)
+    bind = op.get_bind()
+    for enum in reversed(_ENUMS):
+        enum.drop(bind, checkfirst=True)
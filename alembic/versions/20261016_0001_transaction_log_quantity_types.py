@@ -0,0 +1,52 @@
+"""transaction_logs: exact quantity_original, 64-bit quantity_grams
+
+Revision ID: 0001_txlog_quantity_types
+Revises: 0000_initial_schema
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_txlog_quantity_types"
+down_revision: Union[str, Sequence[str], None] = "0000_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "transaction_logs",
+        "quantity_original",
+        type_=sa.DECIMAL(12, 3),
+        existing_nullable=False,
+        postgresql_using="quantity_original::numeric(12,3)",
+    )
+    op.alter_column(
+        "transaction_logs",
+        "quantity_grams",
+        type_=sa.BigInteger(),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "transaction_logs",
+        "quantity_grams",
+        type_=sa.Integer(),
+        existing_nullable=False,
+    )
+    op.alter_column(
+        "transaction_logs",
+        "quantity_original",
+        type_=sa.Float(),
+        existing_nullable=False,
+        postgresql_using="quantity_original::double precision",
+    )
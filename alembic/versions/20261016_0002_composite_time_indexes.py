@@ -0,0 +1,48 @@
+"""composite (owner, created_at DESC) indexes on transaction_logs and sales
+
+Revision ID: 0002_composite_time_indexes
+Revises: 0001_txlog_quantity_types
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_composite_time_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_txlog_quantity_types"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_txlog_user_time",
+        "transaction_logs",
+        ["telegram_user_id", sa.text("created_at DESC")],
+        if_not_exists=True,
+    )
+    # Covered by the leading column of ix_txlog_user_time
+    op.drop_index("ix_transaction_logs_telegram_user_id", table_name="transaction_logs", if_exists=True)
+    op.create_index(
+        "ix_sales_prod_time",
+        "sales",
+        ["product_id", sa.text("created_at DESC")],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sales_prod_time", table_name="sales", if_exists=True)
+    op.create_index(
+        "ix_transaction_logs_telegram_user_id",
+        "transaction_logs",
+        ["telegram_user_id"],
+        if_not_exists=True,
+    )
+    op.drop_index("ix_txlog_user_time", table_name="transaction_logs", if_exists=True)
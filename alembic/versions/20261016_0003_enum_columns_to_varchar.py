@@ -0,0 +1,102 @@
+"""store enum columns as VARCHAR(32) + CHECK instead of native PostgreSQL ENUM types
+
+Revision ID: 0003_enum_columns_to_varchar
+Revises: 0002_composite_time_indexes
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_enum_columns_to_varchar"
+down_revision: Union[str, Sequence[str], None] = "0002_composite_time_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_USER_ROLE = ("ADMIN", "MANAGER", "STAFF")
+_PRODUCT_CATEGORY = (
+    "OUR_CHOCOLATE", "CHOCOLATE_INGREDIENTS", "CHINESE_TEA", "BEVERAGES_COFFEE",
+    "SHOP_MERCHANDISE", "HOUSEHOLD_ITEMS", "CHOCOLATE_PACKAGING", "OTHER_PACKAGING",
+    "PRINTING_MATERIALS", "AI_EXPENSES", "EQUIPMENT_MATERIALS",
+)
+_SYNC_STATUS = ("SUCCESS", "FAILED", "IN_PROGRESS")
+
+# (table, column, native type created by SQLAlchemy, allowed values, server default)
+_ENUM_COLUMNS = (
+    ("users", "role", "userrole", _USER_ROLE, "STAFF"),
+    ("users", "status", "userstatus", ("ACTIVE", "INACTIVE", "SUSPENDED"), "ACTIVE"),
+    ("role_permissions", "role", "userrole", _USER_ROLE, None),
+    ("products", "category", "productcategory", _PRODUCT_CATEGORY, None),
+    ("ingredients", "category", "ingredientcategory",
+     ("CACAO_BASE", "NUTS_SEEDS", "DAIRY_ALT", "COFFEE", "TEA", "PACKAGING", "SPICES", "OTHER"), None),
+    ("ingredients", "unit", "ingredientunit", ("kg", "L", "pc", "btl"), None),
+    ("sales", "source", "salesource", ("TELEGRAM_BOT", "SQUARE_POS", "MANUAL"), "TELEGRAM_BOT"),
+    ("sales", "payment_method", "paymentmethod", ("CASH", "CARD", "BANK_TRANSFER", "CRYPTO", "OTHER"), None),
+    ("production", "status", "productionstatus",
+     ("PLANNED", "IN_PROGRESS", "COMPLETED", "CANCELLED"), "PLANNED"),
+    ("purchases", "status", "purchasestatus", ("ORDERED", "RECEIVED", "CANCELLED"), "ORDERED"),
+    ("square_sync_log", "sync_type", "synctype", ("INVENTORY", "SALES", "PRODUCTS", "FULL"), None),
+    ("square_sync_log", "sync_status", "syncstatus", _SYNC_STATUS, None),
+    ("sheets_sync_log", "sync_status", "syncstatus", _SYNC_STATUS, None),
+    ("audit_log", "action", "actiontype",
+     ("CREATE", "UPDATE", "DELETE", "SALE", "PRODUCTION", "PURCHASE", "INVENTORY_ADJUST", "SYNC"), None),
+    ("transaction_logs", "category", "productcategory", _PRODUCT_CATEGORY, None),
+    ("transaction_logs", "action_type", "transactionactiontype", ("ADD", "CONSUME", "CORRECTION"), None),
+)
+
+# Type names used by database/schema.sql (older installs) and by SQLAlchemy's create_all
+_NATIVE_TYPES = (
+    "user_role", "user_status", "product_category", "ingredient_category", "ingredient_unit",
+    "sale_source", "payment_method", "production_status", "purchase_status", "sync_type",
+    "sync_status", "action_type",
+    "userrole", "userstatus", "productcategory", "ingredientcategory", "ingredientunit",
+    "salesource", "paymentmethod", "productionstatus", "purchasestatus", "synctype",
+    "syncstatus", "actiontype", "transactionactiontype",
+)
+
+
+def _constraint_name(table: str, column: str) -> str:
+    return f"ck_{table}_{column}_enum"
+
+
+def _values_sql(values: Sequence[str]) -> str:
+    return ", ".join(f"'{v}'" for v in values)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, _, values, default in _ENUM_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE VARCHAR(32) USING {column}::text"
+        )
+        if default is not None:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT '{default}'")
+        op.create_check_constraint(
+            _constraint_name(table, column), table, f"{column} IN ({_values_sql(values)})"
+        )
+
+    for type_name in _NATIVE_TYPES:
+        op.execute(f"DROP TYPE IF EXISTS {type_name}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    created = set()
+    for table, column, type_name, values, default in _ENUM_COLUMNS:
+        if type_name not in created:
+            op.execute(f"CREATE TYPE {type_name} AS ENUM ({_values_sql(values)})")
+            created.add(type_name)
+        op.drop_constraint(_constraint_name(table, column), table, type_="check")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {type_name} USING {column}::{type_name}"
+        )
+        if default is not None:
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT '{default}'::{type_name}"
+            )
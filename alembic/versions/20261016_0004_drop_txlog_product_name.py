@@ -0,0 +1,47 @@
+"""drop denormalized transaction_logs.product_name, add (product_id, category) index
+
+Revision ID: 0004_drop_txlog_product_name
+Revises: 0003_enum_columns_to_varchar
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_drop_txlog_product_name"
+down_revision: Union[str, Sequence[str], None] = "0003_enum_columns_to_varchar"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_txlog_prod_cat",
+        "transaction_logs",
+        ["product_id", "category"],
+        if_not_exists=True,
+    )
+    # Covered by the leading column of ix_txlog_prod_cat
+    op.drop_index("ix_transaction_logs_product_id", table_name="transaction_logs", if_exists=True)
+    op.drop_column("transaction_logs", "product_name")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("transaction_logs", sa.Column("product_name", sa.String(255), nullable=True))
+    op.execute(
+        "UPDATE transaction_logs t SET product_name = p.name FROM products p WHERE p.id = t.product_id"
+    )
+    op.alter_column("transaction_logs", "product_name", nullable=False)
+    op.create_index(
+        "ix_transaction_logs_product_id",
+        "transaction_logs",
+        ["product_id"],
+        if_not_exists=True,
+    )
+    op.drop_index("ix_txlog_prod_cat", table_name="transaction_logs", if_exists=True)
@@ -0,0 +1,41 @@
+"""generate UUID primary keys server-side with uuid_generate_v4()
+
+Revision ID: 0005_server_side_uuid_pk
+Revises: 0004_drop_txlog_product_name
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_server_side_uuid_pk"
+down_revision: Union[str, Sequence[str], None] = "0004_drop_txlog_product_name"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables created by create_all (rather than schema.sql) have no DB-side default yet
+_UUID_PK_TABLES = (
+    "users", "products", "ingredients", "inventory_products", "inventory_ingredients",
+    "sales", "production", "production_ingredients_used", "purchases",
+    "square_sync_log", "sheets_sync_log", "audit_log", "transaction_logs",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"')
+    for table in _UUID_PK_TABLES:
+        op.alter_column(table, "id", server_default=sa.text("uuid_generate_v4()"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Python-side uuid4 defaults never needed a DB default; leaving it in
+    # place is harmless, but mirror the pre-upgrade state
+    for table in _UUID_PK_TABLES:
+        op.alter_column(table, "id", server_default=None)
@@ -0,0 +1,96 @@
+"""partition transaction_logs and audit_log by RANGE (created_at), monthly
+
+Revision ID: 0006_partition_log_tables
+Revises: 0005_server_side_uuid_pk
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_partition_log_tables"
+down_revision: Union[str, Sequence[str], None] = "0005_server_side_uuid_pk"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> (foreign keys, indexes) to recreate on the new table
+_TABLES = {
+    "transaction_logs": (
+        ["FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE RESTRICT"],
+        [
+            "CREATE INDEX ix_txlog_user_time ON transaction_logs (telegram_user_id, created_at DESC)",
+            "CREATE INDEX ix_txlog_prod_cat ON transaction_logs (product_id, category)",
+            "CREATE INDEX ix_transaction_logs_action_type ON transaction_logs (action_type)",
+            "CREATE INDEX ix_transaction_logs_created_at ON transaction_logs (created_at)",
+        ],
+    ),
+    "audit_log": (
+        ["FOREIGN KEY (user_id) REFERENCES users(id)"],
+        [
+            "CREATE INDEX ix_audit_log_user_id ON audit_log (user_id)",
+            "CREATE INDEX ix_audit_log_created_at ON audit_log (created_at)",
+        ],
+    ),
+}
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    """Copy `table` into a fresh (partitioned or plain) table with the same columns"""
+    foreign_keys, indexes = _TABLES[table]
+    new = f"{table}_rebuild"
+
+    op.execute(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL")
+    op.execute(
+        f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        + (" PARTITION BY RANGE (created_at)" if partitioned else "")
+    )
+    op.execute(f"ALTER TABLE {new} ALTER COLUMN created_at SET NOT NULL")
+
+    if partitioned:
+        # One partition per month that has data, plus the current and next month
+        op.execute(f"""
+            DO $$
+            DECLARE
+                m date := date_trunc('month', COALESCE((SELECT min(created_at) FROM {table}), now()) AT TIME ZONE 'UTC');
+                last_month date := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month';
+            BEGIN
+                WHILE m <= last_month LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF {new} FOR VALUES FROM (%L) TO (%L)',
+                        '{table}_' || to_char(m, 'YYYY_MM'),
+                        m::text || ' 00:00:00+00',
+                        (m + interval '1 month')::date::text || ' 00:00:00+00'
+                    );
+                    m := m + interval '1 month';
+                END LOOP;
+            END $$;
+        """)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {new} DEFAULT")
+
+    op.execute(f"INSERT INTO {new} SELECT * FROM {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {new} RENAME TO {table}")
+
+    pk = "(id, created_at)" if partitioned else "(id)"
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY {pk}")
+    for fk in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD {fk}")
+    for index in indexes:
+        op.execute(index)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in _TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Partitions are dropped together with the parent in _rebuild
+    for table in _TABLES:
+        _rebuild(table, partitioned=False)
@@ -0,0 +1,69 @@
+"""store THB money columns as BIGINT satang (THB x 100)
+
+Revision ID: 0007_money_in_satang
+Revises: 0006_partition_log_tables
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_money_in_satang"
+down_revision: Union[str, Sequence[str], None] = "0006_partition_log_tables"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, old *_thb column, new *_satang column, nullable)
+_MONEY_COLUMNS = (
+    ("products", "retail_price_thb", "retail_price_satang", False),
+    ("products", "cogs_thb", "cogs_satang", False),
+    ("ingredients", "price_per_unit_thb", "price_per_unit_satang", False),
+    ("sales", "unit_price_thb", "unit_price_satang", False),
+    ("sales", "discount_thb", "discount_satang", True),
+    ("sales", "final_price_thb", "final_price_satang", True),
+    ("production", "cost_materials_thb", "cost_materials_satang", True),
+    ("production", "cost_labor_thb", "cost_labor_satang", True),
+    ("production", "total_cost_thb", "total_cost_satang", True),
+    ("production_ingredients_used", "cost_thb", "cost_satang", True),
+    ("purchases", "unit_price_thb", "unit_price_satang", False),
+)
+
+# Generated columns from schema.sql that depend on the old DECIMAL columns
+# (not mapped by the ORM)
+_GENERATED_COLUMNS = (
+    ("products", "gross_margin_thb"),
+    ("products", "gross_margin_percent"),
+    ("sales", "total_price_thb"),
+    ("purchases", "total_price_thb"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in _GENERATED_COLUMNS:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {column}")
+
+    for table, old, new, nullable in _MONEY_COLUMNS:
+        op.add_column(table, sa.Column(new, sa.BigInteger(), nullable=True))
+        op.execute(f"UPDATE {table} SET {new} = round({old} * 100)")
+        if not nullable:
+            op.alter_column(table, new, nullable=False)
+        op.drop_column(table, old)
+    op.alter_column("sales", "discount_satang", server_default="0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Generated columns dropped in upgrade() are not recreated
+    for table, old, new, nullable in _MONEY_COLUMNS:
+        op.add_column(table, sa.Column(old, sa.DECIMAL(10, 2), nullable=True))
+        op.execute(f"UPDATE {table} SET {old} = {new} / 100.0")
+        if not nullable:
+            op.alter_column(table, old, nullable=False)
+        op.drop_column(table, new)
+    op.alter_column("sales", "discount_thb", server_default="0")
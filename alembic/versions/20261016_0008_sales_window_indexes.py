@@ -0,0 +1,52 @@
+"""(created_at DESC, product_id) on sales; date DESC on production and purchases
+
+Revision ID: 0008_sales_window_indexes
+Revises: 0007_money_in_satang
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_sales_window_indexes"
+down_revision: Union[str, Sequence[str], None] = "0007_money_in_satang"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_sales_created_product",
+        "sales",
+        [sa.text("created_at DESC"), "product_id"],
+        if_not_exists=True,
+    )
+    # Covered by the leading column of ix_sales_created_product
+    # (create_all and schema.sql names respectively)
+    op.drop_index("ix_sales_created_at", table_name="sales", if_exists=True)
+    op.drop_index("idx_sales_created_at", table_name="sales", if_exists=True)
+    op.create_index(
+        "ix_production_date",
+        "production",
+        [sa.text("production_date DESC")],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_purchases_date",
+        "purchases",
+        [sa.text("purchase_date DESC")],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_purchases_date", table_name="purchases", if_exists=True)
+    op.drop_index("ix_production_date", table_name="production", if_exists=True)
+    op.create_index("ix_sales_created_at", "sales", ["created_at"], if_not_exists=True)
+    op.drop_index("ix_sales_created_product", table_name="sales", if_exists=True)
@@ -0,0 +1,31 @@
+"""Square idempotency key prefix on square_sync_log
+
+Revision ID: 0009_square_sync_idempotency_key
+Revises: 0008_sales_window_indexes
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_square_sync_idempotency_key"
+down_revision: Union[str, Sequence[str], None] = "0008_sales_window_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "square_sync_log",
+        sa.Column("idempotency_key", sa.String(length=255), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("square_sync_log", "idempotency_key")
@@ -3,14 +3,17 @@ Admin command handlers
 Only accessible by users with ADMIN role
 """
 
+from html import escape
+
 from telegram import Update
+from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 from sqlalchemy import select
 from loguru import logger
 
-from database.db import get_db
+from database.db import get_db, get_db_readonly
 from database.models import User, UserRole, UserStatus
-from bot.middleware.auth import require_role
+from bot.middleware.auth import require_role, invalidate_user_cache
 
 
 # ============================================
@@ -23,10 +26,9 @@ async def sync_square_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     await update.message.reply_text("🔄 Syncing with Square POS...")
 
     try:
-        from integrations.square_api import SquareIntegration
+        from integrations.square_api import get_square
 
-        square = SquareIntegration()
-        result = await square.sync_inventory()
+        result = await get_square().sync_inventory()
 
         await update.message.reply_text(
             f"✅ Sync completed!\n"
@@ -47,10 +49,9 @@ async def sync_sheets_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     await update.message.reply_text("🔄 Syncing with Google Sheets...")
 
     try:
-        from integrations.google_sheets import GoogleSheetsIntegration
+        from integrations.google_sheets import get_sheets
 
-        sheets = GoogleSheetsIntegration()
-        result = await sheets.sync_all()
+        result = await get_sheets().sync_all()
 
         await update.message.reply_text(
             f"✅ Sync completed!\n"
@@ -78,7 +79,7 @@ async def sync_all_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 @require_role([UserRole.ADMIN])
 async def list_users_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all users"""
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         stmt = select(User).order_by(User.role, User.first_name)
         result = await db.execute(stmt)
         users = result.scalars().all()
@@ -93,19 +94,19 @@ async def list_users_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         for user in users:
             by_role[user.role].append(user)
 
-        response = "👥 **SYSTEM USERS**\n\n"
+        response = "👥 <b>SYSTEM USERS</b>\n\n"
 
         for role in [UserRole.ADMIN, UserRole.MANAGER, UserRole.STAFF]:
             if role in by_role:
-                response += f"**{role.value}:**\n"
+                response += f"<b>{role.value}:</b>\n"
                 for user in by_role[role]:
                     status_emoji = "✅" if user.status == UserStatus.ACTIVE else "❌"
-                    response += f"{status_emoji} {user.first_name} (@{user.telegram_id})\n"
+                    response += f"{status_emoji} {escape(str(user.first_name))} (@{user.telegram_id})\n"
                 response += "\n"
 
-        response += f"_Total: {len(users)} users_"
+        response += f"<i>Total: {len(users)} users</i>"
 
-    await update.message.reply_text(response, parse_mode="Markdown")
+    await update.message.reply_text(response, parse_mode=ParseMode.HTML)
 
 
 @require_role([UserRole.ADMIN])
@@ -157,6 +158,7 @@ async def add_user_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         )
         db.add(new_user)
         await db.commit()
+        invalidate_user_cache(telegram_id)
 
         await update.message.reply_text(
             f"✅ User added!\n"
@@ -202,6 +204,7 @@ async def change_role_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         old_role = user.role
         user.role = new_role
         await db.commit()
+        invalidate_user_cache(telegram_id)
 
         await update.message.reply_text(
             f"✅ Role changed!\n"
@@ -3,15 +3,19 @@ Main command handlers for Chocodealers Bot
 Handles inventory, sales, production, purchases, and reports
 """
 
+from html import escape
+
 from telegram import Update
+from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, update as sql_update, func, and_, or_
 from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from loguru import logger
 from typing import Optional
 
-from database.db import get_db
+from database.db import get_db, get_db_readonly
 from database.models import (
     User, Product, Ingredient, InventoryProduct, InventoryIngredient,
     Sale, Production, Purchase, UserRole, SaleSource, PaymentMethod,
@@ -28,6 +32,25 @@ from bot.utils.formatters import (
 # INVENTORY COMMANDS
 # ============================================
 
+async def fetch_product_inventory(db, low_stock_only: bool = False) -> list:
+    """
+    Fetch (Product, InventoryProduct) rows.
+    With low_stock_only the below-minimum predicate runs in SQL, so only
+    low-stock rows are transferred.
+    """
+    stmt = select(Product, InventoryProduct).join(InventoryProduct)
+
+    if low_stock_only:
+        stmt = stmt.where(
+            InventoryProduct.quantity < InventoryProduct.min_stock_level
+        ).order_by(InventoryProduct.quantity)
+    else:
+        stmt = stmt.order_by(Product.category, Product.sku)
+
+    result = await db.execute(stmt)
+    return result.all()
+
+
 async def inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Show inventory levels
@@ -36,7 +59,7 @@ async def inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = update.effective_user.id
     args = context.args
 
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         # Check if searching for specific product
         if args:
             search_term = " ".join(args).strip()
@@ -60,13 +83,13 @@ async def inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 return
 
             # Show detailed info for found products
-            response = f"🔍 Search results for '{search_term}':\n\n"
+            response = f"🔍 Search results for '{escape(search_term)}':\n\n"
             for product in products[:10]:  # Limit to 10 results
                 inv = product.inventory
-                margin = ((product.retail_price_thb - product.cogs_thb) / product.retail_price_thb * 100)
+                margin = product.margin_pct
 
-                response += f"**{product.name}** ({product.sku})\n"
-                response += f"📦 Stock: **{inv.quantity}** pcs"
+                response += f"<b>{escape(product.name)}</b> ({escape(product.sku)})\n"
+                response += f"📦 Stock: <b>{inv.quantity}</b> pcs"
 
                 if inv.quantity < inv.min_stock_level:
                     response += f" ⚠️ LOW"
@@ -93,26 +116,28 @@ async def inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             for product in products:
                 categories[product.category].append(product)
 
-            response = "📦 **INVENTORY**\n\n"
+            response = "📦 <b>INVENTORY</b>\n\n"
 
             for category, items in categories.items():
-                response += f"**{category.value}**\n"
+                response += f"<b>{category.value}</b>\n"
                 for product in items:
                     inv = product.inventory
                     status = "⚠️" if inv.quantity < inv.min_stock_level else "✅"
-                    response += f"{status} {product.sku}: {inv.quantity} pcs\n"
+                    response += f"{status} {escape(product.sku)}: {inv.quantity} pcs\n"
                 response += "\n"
 
-            response += f"_Total products: {len(products)}_\n"
-            response += "Use `/inventory <SKU>` for details"
+            response += f"<i>Total products: {len(products)}</i>\n"
+            response += "Use <code>/inventory &lt;SKU&gt;</code> for details"
 
-    await update.message.reply_text(response, parse_mode="Markdown")
+    # HTML with escaped product fields: names/SKUs containing * _ ` [ can't
+    # break the message the way they did with Markdown
+    await update.message.reply_text(response, parse_mode=ParseMode.HTML)
     logger.info(f"User {user_id} checked inventory")
 
 
 async def ingredients_inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show ingredients inventory"""
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         stmt = select(Ingredient).join(InventoryIngredient).order_by(
             Ingredient.category, Ingredient.code
         ).options(joinedload(Ingredient.inventory))
@@ -130,31 +155,26 @@ async def ingredients_inventory_command(update: Update, context: ContextTypes.DE
         for ing in ingredients:
             categories[ing.category].append(ing)
 
-        response = "🥜 **INGREDIENTS INVENTORY**\n\n"
+        response = "🥜 <b>INGREDIENTS INVENTORY</b>\n\n"
 
         for category, items in categories.items():
-            response += f"**{category.value}**\n"
+            response += f"<b>{category.value}</b>\n"
             for ing in items:
                 inv = ing.inventory
                 status = "⚠️" if inv.quantity_kg < inv.min_stock_level_kg else "✅"
-                response += f"{status} {ing.code}: {inv.quantity_kg:.2f} kg\n"
+                response += f"{status} {escape(ing.code)}: {inv.quantity_kg:.2f} kg\n"
             response += "\n"
 
-        response += f"_Total ingredients: {len(ingredients)}_"
+        response += f"<i>Total ingredients: {len(ingredients)}</i>"
 
-    await update.message.reply_text(response, parse_mode="Markdown")
+    await update.message.reply_text(response, parse_mode=ParseMode.HTML)
 
 
 async def low_stock_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show products with low stock"""
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         # Products with low stock
-        stmt = select(Product, InventoryProduct).join(InventoryProduct).where(
-            InventoryProduct.quantity < InventoryProduct.min_stock_level
-        ).order_by(InventoryProduct.quantity)
-
-        result = await db.execute(stmt)
-        low_stock_products = result.all()
+        low_stock_products = await fetch_product_inventory(db, low_stock_only=True)
 
         # Ingredients with low stock
         stmt_ing = select(Ingredient, InventoryIngredient).join(InventoryIngredient).where(
@@ -168,23 +188,23 @@ async def low_stock_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text("✅ All products and ingredients are sufficiently stocked!")
             return
 
-        response = "⚠️ **LOW STOCK ITEMS**\n\n"
+        response = "⚠️ <b>LOW STOCK ITEMS</b>\n\n"
 
         if low_stock_products:
-            response += "**PRODUCTS:**\n"
+            response += "<b>PRODUCTS:</b>\n"
             for product, inv in low_stock_products:
                 shortage = inv.min_stock_level - inv.quantity
-                response += f"• {product.sku} ({product.name})\n"
+                response += f"• {escape(product.sku)} ({escape(product.name)})\n"
                 response += f"  Stock: {inv.quantity} / Min: {inv.min_stock_level} (need: {shortage})\n\n"
 
         if low_stock_ingredients:
-            response += "**INGREDIENTS:**\n"
+            response += "<b>INGREDIENTS:</b>\n"
             for ing, inv in low_stock_ingredients:
                 shortage = inv.min_stock_level_kg - inv.quantity_kg
-                response += f"• {ing.code} ({ing.name})\n"
+                response += f"• {escape(ing.code)} ({escape(ing.name)})\n"
                 response += f"  Stock: {inv.quantity_kg:.2f} kg / Min: {inv.min_stock_level_kg:.2f} kg\n\n"
 
-    await update.message.reply_text(response, parse_mode="Markdown")
+    await update.message.reply_text(response, parse_mode=ParseMode.HTML)
 
 
 # ============================================
@@ -212,8 +232,11 @@ async def sale_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     sku = args[0].upper()
     try:
         quantity = int(args[1])
-        custom_price = float(args[2]) if len(args) > 2 else None
-    except ValueError:
+        custom_price = Decimal(args[2]) if len(args) > 2 else None
+        # NaN/Infinity can't be stored as satang; a price must be positive
+        if custom_price is not None and (not custom_price.is_finite() or custom_price <= 0):
+            raise ValueError(args[2])
+    except (ValueError, InvalidOperation):
         await update.message.reply_text("❌ Quantity and price must be numbers.")
         return
 
@@ -222,13 +245,7 @@ async def sale_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         return
 
     async with get_db() as db:
-        # Find product with row-level lock to prevent race conditions
-        stmt = (
-            select(Product)
-            .where(Product.sku == sku)
-            .options(joinedload(Product.inventory))
-            .with_for_update()  # Lock row until transaction commits
-        )
+        stmt = select(Product).where(Product.sku == sku)
         result = await db.execute(stmt)
         product = result.scalar_one_or_none()
 
@@ -236,22 +253,29 @@ async def sale_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             await update.message.reply_text(f"❌ Product with SKU '{sku}' not found.")
             return
 
-        inv = product.inventory
+        # Check and deduct stock in one statement: the WHERE guard replaces the
+        # SELECT ... FOR UPDATE + Python decrement (no lost update, one round-trip)
+        remaining = await db.scalar(
+            sql_update(InventoryProduct)
+            .where(
+                InventoryProduct.product_id == product.id,
+                InventoryProduct.quantity >= quantity,
+            )
+            .values(quantity=InventoryProduct.quantity - quantity)
+            .returning(InventoryProduct.quantity)
+        )
 
-        # Check inventory
-        if inv.quantity < quantity:
+        if remaining is None:
+            available = await db.scalar(
+                select(InventoryProduct.quantity).where(InventoryProduct.product_id == product.id)
+            )
             await update.message.reply_text(
                 f"❌ Insufficient stock!\n"
-                f"Available: {inv.quantity} pcs\n"
+                f"Available: {available or 0} pcs\n"
                 f"Requested: {quantity} pcs"
             )
             return
 
-        # Get user
-        stmt_user = select(User).where(User.telegram_id == user_id)
-        result_user = await db.execute(stmt_user)
-        user = result_user.scalar_one_or_none()
-
         # Calculate price
         unit_price = custom_price if custom_price else product.retail_price_thb
         total_price = quantity * unit_price
@@ -264,13 +288,11 @@ async def sale_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             final_price_thb=total_price,
             source=SaleSource.TELEGRAM_BOT,
             payment_method=PaymentMethod.CASH,
-            created_by=user.id if user else None
+            # Resolved inside the INSERT instead of a separate user lookup
+            created_by=select(User.id).where(User.telegram_id == user_id).scalar_subquery(),
         )
         db.add(sale)
 
-        # Update inventory
-        inv.quantity -= quantity
-
         await db.commit()
 
         # Send receipt
@@ -278,9 +300,9 @@ async def sale_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         profit = (unit_price - product.cogs_thb) * quantity
 
         receipt = f"""
-✅ **SALE REGISTERED**
+✅ <b>SALE REGISTERED</b>
 
-🍫 Product: {product.name} ({sku})
+🍫 Product: {escape(product.name)} ({escape(sku)})
 📦 Quantity: {quantity} pcs
 💰 Price per unit: {unit_price:.2f}฿
 💵 Total: {total_price:.2f}฿
@@ -288,10 +310,10 @@ async def sale_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 📊 Margin: {margin:.1f}%
 💎 Profit: {profit:.2f}฿
 
-📦 Stock remaining: {inv.quantity} pcs
+📦 Stock remaining: {remaining} pcs
 """
 
-        await update.message.reply_text(receipt, parse_mode="Markdown")
+        await update.message.reply_text(receipt, parse_mode=ParseMode.HTML)
         logger.info(f"Sale registered: {sku} x{quantity} by user {user_id}")
 
 
@@ -353,7 +375,7 @@ async def my_profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     """Show user profile"""
     user_id = update.effective_user.id
 
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         stmt = select(User).where(User.telegram_id == user_id)
         result = await db.execute(stmt)
         user = result.scalar_one_or_none()
@@ -363,20 +385,20 @@ async def my_profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
 
         profile = f"""
-👤 **YOUR PROFILE**
+👤 <b>YOUR PROFILE</b>
 
-Name: {user.first_name} {user.last_name or ''}
-Username: @{update.effective_user.username or 'N/A'}
-Telegram ID: `{user.telegram_id}`
+Name: {escape(user.first_name or '')} {escape(user.last_name or '')}
+Username: @{escape(update.effective_user.username or 'N/A')}
+Telegram ID: <code>{user.telegram_id}</code>
 
-🔐 Role: **{user.role.value}**
+🔐 Role: <b>{user.role.value}</b>
 📊 Status: {user.status.value}
 
 📅 Registered: {user.created_at.strftime('%d.%m.%Y')}
 🕐 Last login: {user.last_login.strftime('%d.%m.%Y %H:%M') if user.last_login else 'N/A'}
 """
 
-        await update.message.reply_text(profile, parse_mode="Markdown")
+        await update.message.reply_text(profile, parse_mode=ParseMode.HTML)
 
 
 # ============================================
@@ -10,10 +10,14 @@ Handles all inventory-related commands:
 """
 
 import logging
+import re
+from html import escape
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional, Dict
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
 from telegram.ext import (
     ContextTypes,
     ConversationHandler,
@@ -25,10 +29,11 @@ from telegram.ext import (
 from sqlalchemy import select, desc
 from sqlalchemy.orm import joinedload
 
-from database.db import get_db
+from database.db import get_db, get_db_readonly
 from database.models import (
     Product,
     ProductCategory,
+    PRODUCT_CATEGORY_VALUES,
     TransactionLog,
     TransactionActionType,
     InventoryProduct,
@@ -58,6 +63,12 @@ logger = logging.getLogger(__name__)
     ENTER_NOTES,
 ) = range(5)
 
+# Callback patterns shared by all three conversation handlers (compiled once)
+_CATEGORY_CALLBACK_RE = re.compile(r"^inv_(add|consume|correct)_cat:")
+_PRODUCT_CALLBACK_RE = re.compile(r"^inv_(add|consume|correct)_prod:")
+_CONFIRM_CALLBACK_RE = re.compile(r"^inv_confirm$")
+_CANCEL_CALLBACK_RE = re.compile(r"^inv_cancel$")
+
 
 # ============================================
 # ADD INVENTORY (/add_inventory, /приход)
@@ -148,7 +159,7 @@ async def category_selected(update: Update, context: ContextTypes.DEFAULT_TYPE)
     callback_data = query.data
     # Format: inv_add_cat:OUR_CHOCOLATE
     parts = callback_data.split(":")
-    if len(parts) != 2:
+    if len(parts) != 2 or parts[1] not in PRODUCT_CATEGORY_VALUES:
         await query.edit_message_text("❌ Invalid selection. Please try again.")
         return ConversationHandler.END
 
@@ -160,7 +171,7 @@ async def category_selected(update: Update, context: ContextTypes.DEFAULT_TYPE)
     context.user_data["selected_category"] = category_value
 
     # Fetch products in this category
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         stmt = (
             select(Product)
             .where(Product.category == category_value)
@@ -225,7 +236,7 @@ async def product_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     context.user_data["selected_product_id"] = product_id
 
     # Fetch product details
-    async with get_db() as db:
+    async with get_db_readonly() as db:
         stmt = select(Product).where(Product.id == product_id)
         result = await db.execute(stmt)
         product = result.scalar_one_or_none()
@@ -246,9 +257,9 @@ async def product_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     # Show quantity input prompt
     action_text = {
-        "add": f"➕ **Adding:** {product.name}\n\n",
-        "consume": f"➖ **Consuming:** {product.name}\n\n",
-        "correct": f"✏️ **Correcting:** {product.name}\n\n",
+        "add": f"➕ <b>Adding:</b> {escape(product.name)}\n\n",
+        "consume": f"➖ <b>Consuming:</b> {escape(product.name)}\n\n",
+        "correct": f"✏️ <b>Correcting:</b> {escape(product.name)}\n\n",
     }.get(action, "")
 
     # Suggest appropriate units based on product category
@@ -260,13 +271,13 @@ async def product_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     prompt_text = (
         f"{action_text}"
-        f"💬 **Enter quantity and unit:**\n\n"
-        f"Examples: `5 kg`, `100 g`, `3 pieces`, `2 boxes`\n"
+        f"💬 <b>Enter quantity and unit:</b>\n\n"
+        f"Examples: <code>5 kg</code>, <code>100 g</code>, <code>3 pieces</code>, <code>2 boxes</code>\n"
         f"Supported units: {unit_examples}\n\n"
         f"Type your quantity below:"
     )
 
-    await query.edit_message_text(prompt_text, parse_mode="Markdown")
+    await query.edit_message_text(prompt_text, parse_mode=ParseMode.HTML)
 
     return ENTER_QUANTITY
 
@@ -307,9 +318,9 @@ async def quantity_entered(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     except Exception as e:
         logger.error(f"Unit conversion error: {e}")
         await update.message.reply_text(
-            f"❌ **Conversion error:** {str(e)}\n\n"
+            f"❌ <b>Conversion error:</b> {escape(str(e))}\n\n"
             f"Please try a different unit or contact admin.",
-            parse_mode="Markdown"
+            parse_mode=ParseMode.HTML
         )
         return ENTER_QUANTITY
 
@@ -327,10 +338,10 @@ async def quantity_entered(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     product_name = product_info.get("name", "Unknown")
 
     confirmation_text = (
-        f"{action_emoji} **Confirm {action_name}**\n\n"
-        f"📦 **Product:** {product_name}\n"
-        f"📊 **Quantity:** {display_str}\n"
-        f"💾 **Storage:** {grams}g (base unit)\n\n"
+        f"{action_emoji} <b>Confirm {action_name}</b>\n\n"
+        f"📦 <b>Product:</b> {escape(product_name)}\n"
+        f"📊 <b>Quantity:</b> {escape(display_str)}\n"
+        f"💾 <b>Storage:</b> {grams}g (base unit)\n\n"
         f"Proceed?"
     )
 
@@ -345,7 +356,7 @@ async def quantity_entered(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await update.message.reply_text(
         confirmation_text,
         reply_markup=reply_markup,
-        parse_mode="Markdown"
+        parse_mode=ParseMode.HTML
     )
 
     return CONFIRM_ACTION
@@ -388,10 +399,9 @@ async def confirm_action(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 telegram_user_id=user_info["telegram_user_id"],
                 user_name=user_info["user_name"],
                 product_id=product_id,
-                product_name=product_info["name"],
                 category=ProductCategory(product_info["category"]),
                 action_type=transaction_action,
-                quantity_original=quantity_original,
+                quantity_original=Decimal(str(quantity_original)),
                 quantity_unit=quantity_unit,
                 quantity_grams=quantity_grams,
                 quantity_display=quantity_display,
@@ -469,20 +479,20 @@ async def confirm_action(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             action_past = {"add": "added", "consume": "consumed", "correct": "corrected"}.get(action, "")
 
             success_text = (
-                f"{action_emoji} **Success!** Inventory {action_past}\n\n"
-                f"📦 **Product:** {product_info['name']}\n"
-                f"📊 **Quantity:** {quantity_display}\n"
-                f"💾 **New Stock:** {inventory.quantity}g\n"
-                f"👤 **Recorded by:** {user_info['user_name']}"
+                f"{action_emoji} <b>Success!</b> Inventory {action_past}\n\n"
+                f"📦 <b>Product:</b> {escape(product_info['name'])}\n"
+                f"📊 <b>Quantity:</b> {escape(quantity_display)}\n"
+                f"💾 <b>New Stock:</b> {inventory.quantity}g\n"
+                f"👤 <b>Recorded by:</b> {escape(user_info['user_name'])}"
             )
 
-            await query.edit_message_text(success_text, parse_mode="Markdown")
+            await query.edit_message_text(success_text, parse_mode=ParseMode.HTML)
 
     except Exception as e:
         logger.error(f"Error saving transaction: {e}", exc_info=True)
         await query.edit_message_text(
-            f"❌ **Error saving transaction:**\n\n{str(e)}",
-            parse_mode="Markdown"
+            f"❌ <b>Error saving transaction:</b>\n\n{escape(str(e))}",
+            parse_mode=ParseMode.HTML
         )
 
     return ConversationHandler.END
@@ -561,7 +571,7 @@ async def view_logs_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
 
     try:
-        async with get_db() as db:
+        async with get_db_readonly() as db:
             # Get last 20 transactions
             stmt = (
                 select(TransactionLog)
@@ -581,7 +591,7 @@ async def view_logs_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
 
         # Format logs
-        log_text = "📋 **Recent Transaction Logs** (Last 20)\n\n"
+        log_text = "📋 <b>Recent Transaction Logs</b> (Last 20)\n\n"
         for log in logs:
             action_emoji = {
                 TransactionActionType.ADD: "➕",
@@ -591,18 +601,18 @@ async def view_logs_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
             date_str = log.created_at.strftime("%Y-%m-%d %H:%M")
             log_text += (
-                f"{action_emoji} **{log.action_type.value}** | {log.product_name}\n"
-                f"   📊 {log.quantity_display} | 👤 {log.user_name}\n"
+                f"{action_emoji} <b>{log.action_type.value}</b> | {escape(log.product.name)}\n"
+                f"   📊 {escape(log.quantity_display or '')} | 👤 {escape(log.user_name)}\n"
                 f"   🕐 {date_str}\n\n"
             )
 
-        await update.message.reply_text(log_text, parse_mode="Markdown")
+        await update.message.reply_text(log_text, parse_mode=ParseMode.HTML)
 
     except Exception as e:
         logger.error(f"Error fetching logs: {e}", exc_info=True)
         await update.message.reply_text(
-            f"❌ **Error fetching logs:** {str(e)}",
-            parse_mode="Markdown"
+            f"❌ <b>Error fetching logs:</b> {escape(str(e))}",
+            parse_mode=ParseMode.HTML
         )
 
 
@@ -613,7 +623,7 @@ async def view_logs_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def view_inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """View current inventory levels"""
     try:
-        async with get_db() as db:
+        async with get_db_readonly() as db:
             stmt = (
                 select(InventoryProduct)
                 .options(joinedload(InventoryProduct.product))
@@ -639,24 +649,24 @@ async def view_inventory_command(update: Update, context: ContextTypes.DEFAULT_T
             by_category[category].append(item)
 
         # Format inventory
-        inv_text = "📦 **Current Inventory Levels**\n\n"
+        inv_text = "📦 <b>Current Inventory Levels</b>\n\n"
         for category, items in by_category.items():
             category_name = ProductCategory(category).name.replace("_", " ").title()
-            inv_text += f"**{category_name}:**\n"
+            inv_text += f"<b>{category_name}:</b>\n"
             for item in items:
                 stock_status = "✅" if item.quantity >= item.min_stock_level else "⚠️"
                 inv_text += (
-                    f"  {stock_status} {item.product.name}: {item.quantity}g\n"
+                    f"  {stock_status} {escape(item.product.name)}: {item.quantity}g\n"
                 )
             inv_text += "\n"
 
-        await update.message.reply_text(inv_text, parse_mode="Markdown")
+        await update.message.reply_text(inv_text, parse_mode=ParseMode.HTML)
 
     except Exception as e:
         logger.error(f"Error fetching inventory: {e}", exc_info=True)
         await update.message.reply_text(
-            f"❌ **Error fetching inventory:** {str(e)}",
-            parse_mode="Markdown"
+            f"❌ <b>Error fetching inventory:</b> {escape(str(e))}",
+            parse_mode=ParseMode.HTML
         )
 
 
@@ -672,20 +682,20 @@ def get_add_inventory_handler() -> ConversationHandler:
         ],
         states={
             SELECT_CATEGORY: [
-                CallbackQueryHandler(category_selected, pattern=r"^inv_(add|consume|correct)_cat:"),
+                CallbackQueryHandler(category_selected, pattern=_CATEGORY_CALLBACK_RE),
             ],
             SELECT_PRODUCT: [
-                CallbackQueryHandler(product_selected, pattern=r"^inv_(add|consume|correct)_prod:"),
+                CallbackQueryHandler(product_selected, pattern=_PRODUCT_CALLBACK_RE),
             ],
             ENTER_QUANTITY: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, quantity_entered),
             ],
             CONFIRM_ACTION: [
-                CallbackQueryHandler(confirm_action, pattern="^inv_confirm$"),
+                CallbackQueryHandler(confirm_action, pattern=_CONFIRM_CALLBACK_RE),
             ],
         },
         fallbacks=[
-            CallbackQueryHandler(cancel_inventory_action, pattern="^inv_cancel$"),
+            CallbackQueryHandler(cancel_inventory_action, pattern=_CANCEL_CALLBACK_RE),
             CommandHandler("cancel", cancel_inventory_action),
         ],
     )
@@ -699,20 +709,20 @@ def get_consume_inventory_handler() -> ConversationHandler:
         ],
         states={
             SELECT_CATEGORY: [
-                CallbackQueryHandler(category_selected, pattern=r"^inv_(add|consume|correct)_cat:"),
+                CallbackQueryHandler(category_selected, pattern=_CATEGORY_CALLBACK_RE),
             ],
             SELECT_PRODUCT: [
-                CallbackQueryHandler(product_selected, pattern=r"^inv_(add|consume|correct)_prod:"),
+                CallbackQueryHandler(product_selected, pattern=_PRODUCT_CALLBACK_RE),
             ],
             ENTER_QUANTITY: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, quantity_entered),
             ],
             CONFIRM_ACTION: [
-                CallbackQueryHandler(confirm_action, pattern="^inv_confirm$"),
+                CallbackQueryHandler(confirm_action, pattern=_CONFIRM_CALLBACK_RE),
             ],
         },
         fallbacks=[
-            CallbackQueryHandler(cancel_inventory_action, pattern="^inv_cancel$"),
+            CallbackQueryHandler(cancel_inventory_action, pattern=_CANCEL_CALLBACK_RE),
             CommandHandler("cancel", cancel_inventory_action),
         ],
     )
@@ -726,20 +736,20 @@ def get_correction_handler() -> ConversationHandler:
         ],
         states={
             SELECT_CATEGORY: [
-                CallbackQueryHandler(category_selected, pattern=r"^inv_(add|consume|correct)_cat:"),
+                CallbackQueryHandler(category_selected, pattern=_CATEGORY_CALLBACK_RE),
             ],
             SELECT_PRODUCT: [
-                CallbackQueryHandler(product_selected, pattern=r"^inv_(add|consume|correct)_prod:"),
+                CallbackQueryHandler(product_selected, pattern=_PRODUCT_CALLBACK_RE),
             ],
             ENTER_QUANTITY: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, quantity_entered),
             ],
             CONFIRM_ACTION: [
-                CallbackQueryHandler(confirm_action, pattern="^inv_confirm$"),
+                CallbackQueryHandler(confirm_action, pattern=_CONFIRM_CALLBACK_RE),
             ],
         },
         fallbacks=[
-            CallbackQueryHandler(cancel_inventory_action, pattern="^inv_cancel$"),
+            CallbackQueryHandler(cancel_inventory_action, pattern=_CANCEL_CALLBACK_RE),
             CommandHandler("cancel", cancel_inventory_action),
         ],
     )
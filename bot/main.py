@@ -5,7 +5,9 @@ Main entry point
 
 import asyncio
 import logging
+from html import escape
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -13,15 +15,15 @@ from telegram.ext import (
     CallbackQueryHandler,
     filters,
     ContextTypes,
-    TypeHandler,
 )
+from telegram.request import HTTPXRequest
 from loguru import logger
 import sys
 
 from config.config import settings
-from database.db import init_db, close_db
+from database.db import init_db, close_db, warm_up_pool, maintain_partitions
 from bot.handlers import commands, admin, inventory
-from bot.middleware.auth import AuthMiddleware
+from bot.middleware.auth import AuthMiddleware, AuthUpdateHandler
 from bot.utils.logger import setup_logger
 from bot.utils.staff_auth import handle_staff_selection_callback
 
@@ -34,9 +36,9 @@ async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, edi
     """Show main menu with hierarchical navigation"""
     user = update.effective_user
 
-    welcome_message = f"""🍫 **Chocodealers Warehouse Bot**
+    welcome_message = f"""🍫 <b>Chocodealers Warehouse Bot</b>
 
-Hi, {user.first_name}!
+Hi, {escape(user.first_name)}!
 
 Welcome to your warehouse management system.
 Select a category below to get started:
@@ -64,13 +66,13 @@ Select a category below to get started:
     if edit and update.callback_query:
         await update.callback_query.edit_message_text(
             welcome_message,
-            parse_mode="Markdown",
+            parse_mode=ParseMode.HTML,
             reply_markup=reply_markup
         )
     else:
         await update.message.reply_text(
             welcome_message,
-            parse_mode="Markdown",
+            parse_mode=ParseMode.HTML,
             reply_markup=reply_markup
         )
 
@@ -78,7 +80,10 @@ Select a category below to get started:
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /start command"""
     user = update.effective_user
-    logger.info(f"User {user.id} ({user.username}) started the bot")
+    # Lazy: arguments are only evaluated if a sink accepts INFO records
+    logger.opt(lazy=True).info(
+        "User {} ({}) started the bot", lambda: user.id, lambda: user.username
+    )
     await show_main_menu(update, context, edit=False)
 
 
@@ -208,86 +213,103 @@ Get assistance and system info:
     await query.edit_message_text(message, parse_mode="Markdown", reply_markup=reply_markup)
 
 
+async def show_production_submenu(query) -> None:
+    """Show production info (simple for now)"""
+    await query.edit_message_text(
+        "🏭 **Production**\n\n"
+        "To produce items, use:\n\n"
+        "/production <SKU> <quantity>\n\n"
+        "Example: /production BAR-S-01 100\n\n"
+        "Note: Requires MANAGER or ADMIN role."
+    )
+
+
+# callback_data -> submenu renderer
+_SUBMENUS = {
+    "menu_inventory": show_inventory_submenu,
+    "menu_sales": show_sales_submenu,
+    "menu_production": show_production_submenu,
+    "menu_reports": show_reports_submenu,
+    "menu_admin": show_admin_submenu,
+    "menu_help": show_help_submenu,
+}
+
+
+# Plain-text replies for menu buttons that just point to a command.
+# Interned so identical replies share a single string object.
+_STATIC_REPLIES = {
+    key: sys.intern(text)
+    for key, text in {
+        # Inventory actions
+        "inv_view_stock": "Use command: /view_inventory",
+        "inv_add": "Use command: /add_inventory",
+        "inv_consume": "Use command: /consume_inventory",
+        "inv_correction": "Use command: /correction",
+        "inv_history": "Use command: /view_logs",
+        # Sales actions
+        "sale_quick": (
+            "💰 To register a sale, use:\n\n"
+            "/sale <SKU> <quantity> [price]\n\n"
+            "Example: /sale BAR-S-01 5"
+        ),
+        "sale_report": "Use command: /report day",
+        # Reports actions
+        "report_day": "Use command: /report day",
+        "report_week": "Use command: /report week",
+        "report_month": "Use command: /report month",
+        # Admin actions
+        "admin_users": "Use command: /users",
+        "admin_sync_square": "Use command: /sync_square",
+        "admin_sync_sheets": "Use command: /sync_sheets",
+        "admin_sync_all": "Use command: /sync_all",
+        # Help actions
+        "help_guide": "Use command: /help",
+        "help_status": "Use command: /status",
+        "help_profile": "Use command: /profile",
+    }.items()
+}
+
+
+# Every callback_data value handled by handle_menu_callback. Matched by exact
+# set membership instead of a prefix regex, which also keeps inventory
+# conversation callbacks (inv_add_cat:..., inv_confirm) out of the menu handler.
+_MENU_CALLBACKS = frozenset({"menu_main", *_SUBMENUS, *_STATIC_REPLIES})
+
+
 async def handle_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle all menu navigation callbacks"""
     query = update.callback_query
-    await query.answer()
+    # Acknowledge the click concurrently with the edit instead of waiting
+    # for a separate round-trip first
+    answer_task = asyncio.create_task(query.answer())
+    try:
+        await _dispatch_menu_callback(update, context, query)
+    finally:
+        try:
+            await answer_task
+        except Exception as e:
+            logger.warning(f"Failed to answer callback query {query.id}: {e}")
+
 
+async def _dispatch_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, query) -> None:
+    """Route a menu callback to the matching submenu or reply"""
     callback_data = query.data
 
     # Main menu navigation
     if callback_data == "menu_main":
         await show_main_menu(update, context, edit=True)
+        return
 
     # Submenu navigation
-    elif callback_data == "menu_inventory":
-        await show_inventory_submenu(query)
-    elif callback_data == "menu_sales":
-        await show_sales_submenu(query)
-    elif callback_data == "menu_reports":
-        await show_reports_submenu(query)
-    elif callback_data == "menu_admin":
-        await show_admin_submenu(query)
-    elif callback_data == "menu_help":
-        await show_help_submenu(query)
-
-    # Inventory actions
-    elif callback_data == "inv_view_stock":
-        await query.edit_message_text("Use command: /view_inventory")
-    elif callback_data == "inv_add":
-        await query.edit_message_text("Use command: /add_inventory")
-    elif callback_data == "inv_consume":
-        await query.edit_message_text("Use command: /consume_inventory")
-    elif callback_data == "inv_correction":
-        await query.edit_message_text("Use command: /correction")
-    elif callback_data == "inv_history":
-        await query.edit_message_text("Use command: /view_logs")
-
-    # Sales actions
-    elif callback_data == "sale_quick":
-        await query.edit_message_text(
-            "💰 To register a sale, use:\n\n"
-            "/sale <SKU> <quantity> [price]\n\n"
-            "Example: /sale BAR-S-01 5"
-        )
-    elif callback_data == "sale_report":
-        await query.edit_message_text("Use command: /report day")
-
-    # Reports actions
-    elif callback_data == "report_day":
-        await query.edit_message_text("Use command: /report day")
-    elif callback_data == "report_week":
-        await query.edit_message_text("Use command: /report week")
-    elif callback_data == "report_month":
-        await query.edit_message_text("Use command: /report month")
-
-    # Admin actions
-    elif callback_data == "admin_users":
-        await query.edit_message_text("Use command: /users")
-    elif callback_data == "admin_sync_square":
-        await query.edit_message_text("Use command: /sync_square")
-    elif callback_data == "admin_sync_sheets":
-        await query.edit_message_text("Use command: /sync_sheets")
-    elif callback_data == "admin_sync_all":
-        await query.edit_message_text("Use command: /sync_all")
-
-    # Help actions
-    elif callback_data == "help_guide":
-        await query.edit_message_text("Use command: /help")
-    elif callback_data == "help_status":
-        await query.edit_message_text("Use command: /status")
-    elif callback_data == "help_profile":
-        await query.edit_message_text("Use command: /profile")
-
-    # Production menu (simple for now)
-    elif callback_data == "menu_production":
-        await query.edit_message_text(
-            "🏭 **Production**\n\n"
-            "To produce items, use:\n\n"
-            "/production <SKU> <quantity>\n\n"
-            "Example: /production BAR-S-01 100\n\n"
-            "Note: Requires MANAGER or ADMIN role."
-        )
+    submenu = _SUBMENUS.get(callback_data)
+    if submenu is not None:
+        await submenu(query)
+        return
+
+    # Static "Use command" replies (plain text, no entity parsing needed)
+    reply = _STATIC_REPLIES.get(callback_data)
+    if reply is not None:
+        await query.edit_message_text(reply, parse_mode=None)
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -352,14 +374,18 @@ Questions? Contact the administrator.
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show bot status"""
     from database.models import User, Product, Ingredient
-    from database.db import get_db
+    from database.db import get_db_readonly
     from sqlalchemy import select, func
 
-    async with get_db() as db:
-        # Count stats
-        total_users = await db.scalar(select(func.count(User.id)))
-        total_products = await db.scalar(select(func.count(Product.id)))
-        total_ingredients = await db.scalar(select(func.count(Ingredient.id)))
+    async with get_db_readonly() as db:
+        # Count stats in a single round-trip (one SELECT with scalar subqueries)
+        stmt = select(
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(Product.id)).scalar_subquery(),
+            select(func.count(Ingredient.id)).scalar_subquery(),
+        )
+        result = await db.execute(stmt)
+        total_users, total_products, total_ingredients = result.one()
 
     status_text = f"""
 🤖 **Chocodealers Bot Status**
@@ -387,6 +413,14 @@ Use `/help` for list of all commands.
     await update.message.reply_text(status_text, parse_mode="Markdown")
 
 
+async def maintain_partitions_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Daily: make sure next month's log partitions exist before rows arrive"""
+    try:
+        await maintain_partitions()
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {e}")
+
+
 async def post_init(application: Application) -> None:
     """Initialize database and other services after bot starts"""
     logger.info("🔄 Running post-init setup...")
@@ -396,8 +430,14 @@ async def post_init(application: Application) -> None:
         # Force database table creation
         logger.info("📦 Starting database initialization...")
         await init_db()
+        await warm_up_pool()
         logger.success("✅ Database initialized successfully")
 
+        if application.job_queue:
+            application.job_queue.run_repeating(
+                maintain_partitions_job, interval=86400, first=86400, name="maintain_partitions"
+            )
+
         # Auto-seed database if empty
         logger.info("🌱 Checking if database needs seeding...")
         try:
@@ -418,28 +458,51 @@ async def post_init(application: Application) -> None:
 async def post_shutdown(application: Application) -> None:
     """Cleanup after bot stops"""
     logger.info("Shutting down...")
+    # Integrations are imported lazily: only close the ones that were used
+    square = sys.modules.get("integrations.square_api")
+    if square is not None:
+        await square.close_square()
+    sheets = sys.modules.get("integrations.google_sheets")
+    if sheets is not None:
+        await sheets.close_sheets()
     await close_db()
     logger.success("Bot shut down successfully")
+    # Flush records still queued for the file sink
+    await logger.complete()
 
 
 def main() -> None:
     """Run the bot"""
+    settings.validate_paths()
     logger.info("Starting Chocodealers Warehouse Bot...")
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Log level: {settings.log_level}")
 
     # Create application
+    # Shared HTTP/2 connection pool for Bot API calls; getUpdates gets its
+    # own small pool so long polling never blocks outgoing replies
+    request = HTTPXRequest(
+        connection_pool_size=256,
+        http_version="2",
+        read_timeout=15,
+        write_timeout=15,
+    )
+    get_updates_request = HTTPXRequest(connection_pool_size=8, http_version="2")
+
     application = (
         Application.builder()
         .token(settings.telegram_bot_token)
+        .request(request)
+        .get_updates_request(get_updates_request)
         .post_init(post_init)
         .post_shutdown(post_shutdown)
         .build()
     )
 
     # Add middleware (runs before all commands with group=-1)
+    # Only message/callback updates are authenticated; other update types skip the DB
     auth_middleware = AuthMiddleware()
-    application.add_handler(TypeHandler(Update, auth_middleware), group=-1)
+    application.add_handler(AuthUpdateHandler(auth_middleware), group=-1)
 
     # Basic commands
     application.add_handler(CommandHandler("start", start))
@@ -447,7 +510,7 @@ def main() -> None:
     application.add_handler(CommandHandler("status", status_command))
 
     # Menu navigation callback handler (for all inline keyboard buttons)
-    application.add_handler(CallbackQueryHandler(handle_menu_callback, pattern=r"^(menu_|inv_|sale_|report_|admin_|help_)"))
+    application.add_handler(CallbackQueryHandler(handle_menu_callback, pattern=_MENU_CALLBACKS.__contains__))
 
     # Inventory commands (legacy)
     application.add_handler(CommandHandler("inventory", commands.inventory_command))
@@ -497,7 +560,12 @@ def main() -> None:
     logger.success("Bot started successfully!")
     logger.info("Press Ctrl+C to stop")
 
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    # Long-poll up to 20s per getUpdates and only request the update types we handle
+    application.run_polling(
+        poll_interval=0.0,
+        timeout=20,
+        allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
+    )
 
 
 if __name__ == "__main__":
@@ -3,17 +3,118 @@ Authentication and authorization middleware
 Checks user permissions before executing commands
 """
 
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
 from functools import wraps
 from telegram import Update
-from telegram.ext import ContextTypes
+from telegram.ext import ContextTypes, TypeHandler
 from sqlalchemy import select
-from typing import List, Callable
+from typing import Dict, Final, List, Callable, NamedTuple, Optional, Tuple
 from loguru import logger
 
-from database.db import get_db
+from database.db import get_db_readonly
 from database.models import User, UserRole, UserStatus
 
 
+# Role hierarchy for check_permission (higher level includes lower ones)
+_ROLE_LEVEL: Final[Dict[UserRole, int]] = {
+    UserRole.STAFF: 1,
+    UserRole.MANAGER: 2,
+    UserRole.ADMIN: 3,
+}
+
+
+# ============================================
+# USER CACHE
+# ============================================
+
+class CachedUser(NamedTuple):
+    """Snapshot of the User columns needed for auth checks (safe to keep across sessions)"""
+    id: uuid.UUID
+    telegram_id: int
+    role: UserRole
+    status: UserStatus
+
+
+# telegram_id -> (expires_at, CachedUser or None for unregistered ids),
+# least recently used first. Entries expire after _USER_CACHE_TTL seconds and
+# are invalidated immediately by the admin commands that modify users.
+_USER_CACHE_TTL = 60.0
+_USER_CACHE_MAXSIZE = 10_000
+_user_cache: "OrderedDict[int, Tuple[float, Optional[CachedUser]]]" = OrderedDict()
+# telegram_id -> in-flight DB lookup: concurrent misses for one user share a
+# single query, while lookups for different users run independently
+_user_loads: "Dict[int, asyncio.Task]" = {}
+# telegram_id -> invalidation count; a lookup that started before an
+# invalidation doesn't store its (possibly stale) result
+_user_generation: Dict[int, int] = {}
+
+
+def _cache_lookup(telegram_id: int) -> Tuple[bool, Optional[CachedUser]]:
+    """Return (hit, user) for a non-expired cache entry"""
+    entry = _user_cache.get(telegram_id)
+    if entry is None:
+        return False, None
+
+    expires_at, user = entry
+    if expires_at < time.monotonic():
+        del _user_cache[telegram_id]
+        return False, None
+
+    _user_cache.move_to_end(telegram_id)
+    return True, user
+
+
+async def _query_user(telegram_id: int) -> Optional[CachedUser]:
+    """Load the user from the DB and cache it (unless invalidated meanwhile)"""
+    generation = _user_generation.get(telegram_id, 0)
+
+    async with get_db_readonly() as db:
+        stmt = select(User.id, User.telegram_id, User.role, User.status).where(
+            User.telegram_id == telegram_id
+        )
+        result = await db.execute(stmt)
+        row = result.one_or_none()
+
+    user = CachedUser(*row) if row else None
+    if _user_generation.get(telegram_id, 0) == generation:
+        _user_cache[telegram_id] = (time.monotonic() + _USER_CACHE_TTL, user)
+        if len(_user_cache) > _USER_CACHE_MAXSIZE:
+            _user_cache.popitem(last=False)
+    return user
+
+
+async def _load_user(telegram_id: int) -> Optional[CachedUser]:
+    """Return the user for telegram_id, hitting the DB only on cache miss"""
+    hit, user = _cache_lookup(telegram_id)
+    if hit:
+        return user
+
+    task = _user_loads.get(telegram_id)
+    if task is None:
+        task = asyncio.create_task(_query_user(telegram_id))
+        _user_loads[telegram_id] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            if _user_loads.get(telegram_id) is finished:
+                del _user_loads[telegram_id]
+
+        task.add_done_callback(_done)
+
+    # Shielded: one waiter being cancelled doesn't cancel the shared query
+    return await asyncio.shield(task)
+
+
+def invalidate_user_cache(telegram_id: int) -> None:
+    """Drop a cached user after its role/status was changed"""
+    _user_cache.pop(telegram_id, None)
+    # The next lookup starts a fresh query instead of joining one in flight
+    _user_loads.pop(telegram_id, None)
+    _user_generation[telegram_id] = _user_generation.get(telegram_id, 0) + 1
+
+
 def require_role(allowed_roles: List[UserRole]) -> Callable:
     """
     Decorator to require specific roles for a command
@@ -30,6 +131,11 @@ def require_role(allowed_roles: List[UserRole]) -> Callable:
         async def manager_command(update, context):
             ...
     """
+    # Built once per decorated command, not on every call
+    allowed_set = frozenset(allowed_roles)
+    allowed_names = [r.value for r in allowed_roles]
+    allowed_str = ", ".join(allowed_names)
+
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
@@ -40,11 +146,8 @@ def require_role(allowed_roles: List[UserRole]) -> Callable:
 
             # Fallback to DB if middleware didn't run (shouldn't happen in production)
             if user is None:
-                logger.warning(f"User {user_id} not in context, fetching from DB (middleware may not be running)")
-                async with get_db() as db:
-                    stmt = select(User).where(User.telegram_id == user_id)
-                    result = await db.execute(stmt)
-                    user = result.scalar_one_or_none()
+                logger.warning(f"User {user_id} not in context, loading directly (middleware may not be running)")
+                user = await _load_user(user_id)
 
             if not user:
                 await update.message.reply_text(
@@ -62,15 +165,15 @@ def require_role(allowed_roles: List[UserRole]) -> Callable:
                 logger.warning(f"Inactive user {user_id} tried to use bot")
                 return
 
-            if user.role not in allowed_roles:
+            if user.role not in allowed_set:
                 await update.message.reply_text(
                     f"❌ Insufficient permissions.\n"
-                    f"Required role: {', '.join([r.value for r in allowed_roles])}\n"
+                    f"Required role: {allowed_str}\n"
                     f"Your role: {user.role.value}"
                 )
                 logger.warning(
                     f"User {user_id} ({user.role.value}) tried to access "
-                    f"command requiring {[r.value for r in allowed_roles]}"
+                    f"command requiring {allowed_names}"
                 )
                 return
 
@@ -84,7 +187,8 @@ def require_role(allowed_roles: List[UserRole]) -> Callable:
 class AuthMiddleware:
     """
     Middleware for authentication and authorization
-    Can be used with application.add_middleware()
+    Registered via AuthUpdateHandler in group -1; stores the user in
+    context.user_data["db_user"] for require_role
     """
 
     async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -93,17 +197,15 @@ class AuthMiddleware:
             user_id = update.effective_user.id
 
             try:
-                async with get_db() as db:
-                    stmt = select(User).where(User.telegram_id == user_id)
-                    result = await db.execute(stmt)
-                    user = result.scalar_one_or_none()
+                user = await _load_user(user_id)
 
-                    # Store user in context for later use
-                    context.user_data["db_user"] = user
-                    context.user_data["is_authenticated"] = user is not None
-                    context.user_data["is_active"] = user.status == UserStatus.ACTIVE if user else False
+                # Store user in context for later use
+                context.user_data["db_user"] = user
+                context.user_data["is_authenticated"] = user is not None
+                context.user_data["is_active"] = user.status == UserStatus.ACTIVE if user else False
 
-                    logger.debug(f"✅ AuthMiddleware: User {user_id} loaded from DB")
+                # Lazy: nothing is formatted unless DEBUG is enabled
+                logger.opt(lazy=True).debug("✅ AuthMiddleware: User {} loaded", lambda: user_id)
             except Exception as e:
                 # CRITICAL: Log but don't crash - let bot run even if DB is broken
                 logger.error(f"❌ AuthMiddleware DB error for user {user_id}: {type(e).__name__}: {e}")
@@ -115,29 +217,34 @@ class AuthMiddleware:
                 context.user_data["is_active"] = False
 
 
+class AuthUpdateHandler(TypeHandler):
+    """
+    TypeHandler that only runs the middleware for updates that can reach a
+    command or menu handler (messages and callback queries).
+    Polls, chat member changes etc. are skipped so they don't hit the DB.
+    """
+
+    def __init__(self, callback: Callable):
+        super().__init__(Update, callback)
+
+    def check_update(self, update: object) -> bool:
+        return isinstance(update, Update) and bool(update.message or update.callback_query)
+
+
 async def check_permission(user_id: int, required_role: UserRole) -> bool:
     """
     Check if user has required permission level
     Returns True if user has required role or higher
     """
-    role_hierarchy = {
-        UserRole.STAFF: 1,
-        UserRole.MANAGER: 2,
-        UserRole.ADMIN: 3
-    }
-
-    async with get_db() as db:
-        stmt = select(User).where(User.telegram_id == user_id)
-        result = await db.execute(stmt)
-        user = result.scalar_one_or_none()
+    user = await _load_user(user_id)
 
-        if not user or user.status != UserStatus.ACTIVE:
-            return False
+    if not user or user.status != UserStatus.ACTIVE:
+        return False
 
-        user_level = role_hierarchy.get(user.role, 0)
-        required_level = role_hierarchy.get(required_role, 99)
+    user_level = _ROLE_LEVEL.get(user.role, 0)
+    required_level = _ROLE_LEVEL.get(required_role, 99)
 
-        return user_level >= required_level
+    return user_level >= required_level
 
 
 async def is_admin(user_id: int) -> bool:
@@ -147,9 +254,5 @@ async def is_admin(user_id: int) -> bool:
 
 async def get_user_role(user_id: int) -> UserRole | None:
     """Get user's current role"""
-    async with get_db() as db:
-        stmt = select(User).where(User.telegram_id == user_id)
-        result = await db.execute(stmt)
-        user = result.scalar_one_or_none()
-
-        return user.role if user else None
+    user = await _load_user(user_id)
+    return user.role if user else None
@@ -1,60 +1,63 @@
 """
 Message formatters for beautiful Telegram outputs
+
+All formatters return HTML: send with parse_mode=ParseMode.HTML.
+User-controlled fields (names, SKUs, notes) are escaped once here.
 """
 
+from html import escape
 from typing import List
 from database.models import Product, Ingredient, Sale
 
 
 def format_product_info(product: Product, inventory_quantity: int) -> str:
     """Format product information"""
-    margin = ((product.retail_price_thb - product.cogs_thb) / product.retail_price_thb * 100)
+    margin = product.margin_pct
 
     return f"""
-🍫 **{product.name}**
-SKU: `{product.sku}`
+🍫 <b>{escape(product.name)}</b>
+SKU: <code>{escape(product.sku)}</code>
 Category: {product.category.value}
-Weight: {product.weight_g}g | Cocoa: {product.cocoa_percent}
+Weight: {product.weight_g}g | Cocoa: {escape(product.cocoa_percent or '')}
 
 💰 Price: {product.retail_price_thb}฿
 📊 COGS: {product.cogs_thb}฿
 📈 Margin: {margin:.1f}%
 
-📦 Stock: **{inventory_quantity}** pcs
+📦 Stock: <b>{inventory_quantity}</b> pcs
 """
 
 
 def format_ingredient_info(ingredient: Ingredient, inventory_quantity: float) -> str:
     """Format ingredient information"""
     return f"""
-🥜 **{ingredient.name}**
-Code: `{ingredient.code}`
+🥜 <b>{escape(ingredient.name)}</b>
+Code: <code>{escape(ingredient.code)}</code>
 Category: {ingredient.category.value}
 
 💰 Price: {ingredient.price_per_unit_thb}฿/{ingredient.unit.value}
-🏭 Supplier: {ingredient.supplier or 'N/A'}
+🏭 Supplier: {escape(ingredient.supplier or 'N/A')}
 
-📦 Stock: **{inventory_quantity:.2f}** {ingredient.unit.value}
+📦 Stock: <b>{inventory_quantity:.2f}</b> {ingredient.unit.value}
 """
 
 
-def format_inventory_list(products: List[tuple], show_low_stock: bool = False) -> str:
-    """Format list of products with inventory"""
+def format_inventory_list(products: List[tuple]) -> str:
+    """
+    Format list of products with inventory.
+    Low-stock filtering is done in SQL by the caller (see format_low_stock_alert).
+    """
     if not products:
         return "❌ No products found"
 
-    response = "📦 **INVENTORY**\n\n"
+    parts = ["📦 <b>INVENTORY</b>\n\n"]
 
     for product, inventory in products:
         status = "⚠️" if inventory.quantity < inventory.min_stock_level else "✅"
+        parts.append(f"{status} <b>{escape(product.sku)}</b>: {inventory.quantity} pcs\n")
+        parts.append(f"   {escape(product.name)} ({product.retail_price_thb}฿)\n\n")
 
-        if show_low_stock and inventory.quantity >= inventory.min_stock_level:
-            continue
-
-        response += f"{status} **{product.sku}**: {inventory.quantity} pcs\n"
-        response += f"   {product.name} ({product.retail_price_thb}฿)\n\n"
-
-    return response
+    return "".join(parts)
 
 
 def format_sale_receipt(sale: Sale, product: Product) -> str:
@@ -63,9 +66,9 @@ def format_sale_receipt(sale: Sale, product: Product) -> str:
     profit = (sale.unit_price_thb - product.cogs_thb) * sale.quantity
 
     return f"""
-✅ **SALE REGISTERED**
+✅ <b>SALE REGISTERED</b>
 
-🍫 Product: {product.name}
+🍫 Product: {escape(product.name)}
 📦 Quantity: {sale.quantity} pcs
 💰 Price: {sale.unit_price_thb}฿/pc
 💵 Total: {total:.2f}฿
@@ -82,21 +85,21 @@ def format_low_stock_alert(products: List[tuple]) -> str:
     if not products:
         return "✅ All products sufficiently stocked"
 
-    response = "⚠️ **LOW STOCK ITEMS**\n\n"
+    parts = ["⚠️ <b>LOW STOCK ITEMS</b>\n\n"]
 
     for product, inventory in products:
         shortage = inventory.min_stock_level - inventory.quantity
-        response += f"• **{product.sku}** - {product.name}\n"
-        response += f"  Stock: {inventory.quantity} / Min: {inventory.min_stock_level}\n"
-        response += f"  Need to order: {shortage} pcs\n\n"
+        parts.append(f"• <b>{escape(product.sku)}</b> - {escape(product.name)}\n")
+        parts.append(f"  Stock: {inventory.quantity} / Min: {inventory.min_stock_level}\n")
+        parts.append(f"  Need to order: {shortage} pcs\n\n")
 
-    return response
+    return "".join(parts)
 
 
 def format_report_summary(period: str, stats: dict) -> str:
     """Format sales report summary"""
     return f"""
-📊 **REPORT FOR {period.upper()}**
+📊 <b>REPORT FOR {escape(period.upper())}</b>
 
 💰 Revenue: {stats.get('revenue', 0):.2f}฿
 💎 Profit: {stats.get('profit', 0):.2f}฿
@@ -104,5 +107,5 @@ def format_report_summary(period: str, stats: dict) -> str:
 🧾 Number of sales: {stats.get('sales_count', 0)}
 
 📈 Average sale: {stats.get('avg_sale', 0):.2f}฿
-🔝 Top product: {stats.get('top_product', 'N/A')}
+🔝 Top product: {escape(str(stats.get('top_product', 'N/A')))}
 """
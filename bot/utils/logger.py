@@ -7,6 +7,10 @@ import sys
 from pathlib import Path
 
 
+# Set once sinks are installed; repeated setup_logger calls are no-ops
+_initialized = False
+
+
 def setup_logger(log_level: str = "INFO", log_file: str = "./logs/chocodealers_bot.log"):
     """
     Setup loguru logger with file and console outputs
@@ -15,6 +19,10 @@ def setup_logger(log_level: str = "INFO", log_file: str = "./logs/chocodealers_b
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
         log_file: Path to log file
     """
+    global _initialized
+    if _initialized:
+        return
+
     # Remove default handler
     logger.remove()
 
@@ -29,7 +37,8 @@ def setup_logger(log_level: str = "INFO", log_file: str = "./logs/chocodealers_b
     # Add file handler with rotation (skip if filesystem is read-only)
     try:
         log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        if not log_path.parent.is_dir():
+            log_path.parent.mkdir(parents=True, exist_ok=True)
 
         logger.add(
             log_file,
@@ -37,9 +46,12 @@ def setup_logger(log_level: str = "INFO", log_file: str = "./logs/chocodealers_b
             level=log_level,
             rotation="10 MB",
             retention="1 month",
-            compression="zip"
+            compression="zip",
+            enqueue=True,  # write/rotate in a background thread, not on the event loop
         )
         logger.info(f"Logger initialized. Level: {log_level}, File: {log_file}")
     except (OSError, PermissionError) as e:
         logger.warning(f"Could not create log file (using stdout only): {e}")
         logger.info(f"Logger initialized. Level: {log_level}, Console only")
+
+    _initialized = True
@@ -15,7 +15,7 @@ Mode B staff names (if needed for shared tablet):
 - Thei, Nu, Choco
 """
 
-from typing import Optional, Dict, List
+from typing import Optional, Dict, FrozenSet
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
@@ -32,17 +32,20 @@ INDIVIDUAL_STAFF_ACCOUNTS: Dict[int, str] = {
     # 123456789: "Name",
 }
 
-# Admin Telegram user IDs
-ADMIN_USER_IDS: List[int] = [
+# Admin Telegram user IDs (frozenset: O(1) membership, safe to share)
+ADMIN_USER_IDS: FrozenSet[int] = frozenset({
     7699749902,  # Sah (shop owner)
     47361914,    # Ксюша (partner)
     # Add more admins here if needed:
     # 123456789,  # Another admin
-]
+})
 
 # Staff name options for Mode B (shared account)
 STAFF_NAMES = ["Thei", "Nu", "Choco"]
 
+# callback_data -> staff name, e.g. "staff_select:Thei" -> "Thei"
+_STAFF_CALLBACKS: Dict[str, str] = {f"staff_select:{name}": name for name in STAFF_NAMES}
+
 
 # ============================================
 # AUTHENTICATION FUNCTIONS
@@ -95,21 +98,23 @@ def get_staff_name_from_telegram(telegram_user_id: int, username: Optional[str]
     return None
 
 
+# Staff selection keyboard is immutable, so it is built once at import
+_STAFF_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton(f"👤 {name}", callback_data=f"staff_select:{name}")
+        for name in STAFF_NAMES
+    ]
+])
+
+
 def create_staff_selection_keyboard() -> InlineKeyboardMarkup:
     """
-    Create inline keyboard with staff name selection buttons (Mode B).
+    Get inline keyboard with staff name selection buttons (Mode B).
 
     Returns:
-        InlineKeyboardMarkup with [Thei] [Nu] [Choco] buttons
+        Shared InlineKeyboardMarkup with [Thei] [Nu] [Choco] buttons
     """
-    keyboard = [
-        [
-            InlineKeyboardButton("👤 Thei", callback_data="staff_select:Thei"),
-            InlineKeyboardButton("👤 Nu", callback_data="staff_select:Nu"),
-            InlineKeyboardButton("👤 Choco", callback_data="staff_select:Choco"),
-        ]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _STAFF_KEYBOARD
 
 
 async def request_staff_selection(
@@ -210,24 +215,22 @@ async def handle_staff_selection_callback(
     query = update.callback_query
     await query.answer()
 
-    # Extract staff name from callback data
-    # Format: "staff_select:Thei"
-    callback_data = query.data
-    if callback_data.startswith("staff_select:"):
-        staff_name = callback_data.split(":", 1)[1]
-
-        # Store in context for this session
-        context.user_data["selected_staff_name"] = staff_name
+    # Resolve staff name from callback data (format: "staff_select:Thei");
+    # unknown or malformed data is rejected by the lookup itself
+    staff_name = _STAFF_CALLBACKS.get(query.data)
+    if staff_name is None:
+        return None
 
-        # Confirm selection
-        await query.edit_message_text(
-            f"✅ **Selected:** {staff_name}\n\nYou can now proceed with inventory operations.",
-            parse_mode="Markdown"
-        )
+    # Store in context for this session
+    context.user_data["selected_staff_name"] = staff_name
 
-        return staff_name
+    # Confirm selection
+    await query.edit_message_text(
+        f"✅ **Selected:** {staff_name}\n\nYou can now proceed with inventory operations.",
+        parse_mode="Markdown"
+    )
 
-    return None
+    return staff_name
 
 
 def clear_staff_selection(context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -5,6 +5,7 @@ All quantities are stored in GRAMS as the base unit in the database.
 This module handles conversion from various input units to grams and back.
 """
 
+import re
 from typing import Optional, Tuple, Dict
 from decimal import Decimal
 
@@ -53,6 +54,36 @@ WEIGHT_CONVERSIONS: Dict[str, float] = {
 }
 
 
+# Unit groups used to pick the conversion/display branch
+_KG_UNITS = frozenset({"кг", "kg", "килограмм", "килограммы", "килограммов", "kilogram", "kilograms"})
+_L_UNITS = frozenset({"л", "l", "литр", "литры", "литров", "liter", "liters"})
+_PIECE_UNITS = frozenset({"штука", "штуки", "штук", "шт", "piece", "pieces", "pc", "pcs"})
+_PACKAGE_UNITS = frozenset({
+    "коробка", "коробки", "коробок", "box", "boxes",
+    "пачка", "пачки", "пачек", "pack", "packs",
+})
+_PIECE_DISPLAY_UNITS = frozenset({"pieces", "штуки", "шт"})
+_KG_DISPLAY_UNITS = frozenset({"kg", "кг"})
+
+# unit -> (kind, grams multiplier, display suffix); one lookup picks the branch
+# in convert_to_grams. Multiplier/suffix only apply to weight units.
+_UNIT_DISPATCH: Dict[str, Tuple[str, float, str]] = {
+    **{
+        unit: (
+            "weight",
+            multiplier,
+            "kg" if unit in _KG_UNITS else "L" if unit in _L_UNITS else "",
+        )
+        for unit, multiplier in WEIGHT_CONVERSIONS.items()
+    },
+    **{unit: ("piece", 1.0, "") for unit in _PIECE_UNITS},
+    **{unit: ("package", 1.0, "") for unit in _PACKAGE_UNITS},
+}
+
+# Compact quantity input without a space, e.g. "5kg" or "100г"
+_QTY_RE = re.compile(r'^([\d.]+)\s*([a-zA-Zа-яА-Я]+)$')
+
+
 # ============================================
 # CONVERSION FUNCTIONS
 # ============================================
@@ -83,41 +114,30 @@ def convert_to_grams(
         (300, "300g (3 pieces)")
     """
     unit_lower = unit.lower().strip()
+    entry = _UNIT_DISPATCH.get(unit_lower)
 
-    # Case 1: Weight-based units (direct conversion)
-    if unit_lower in WEIGHT_CONVERSIONS:
-        multiplier = WEIGHT_CONVERSIONS[unit_lower]
-        grams = int(value * multiplier)
-
-        # Format display string
-        if unit_lower in ["кг", "kg", "килограмм", "килограммы", "килограммов", "kilogram", "kilograms"]:
-            display = f"{grams}g ({value}kg)"
-        elif unit_lower in ["л", "l", "литр", "литры", "литров", "liter", "liters"]:
-            display = f"{grams}g ({value}L)"
-        else:
-            display = f"{grams}g"
-
-        return (grams, display)
+    if entry is not None:
+        kind, multiplier, suffix = entry
 
-    # Case 2: Piece-based units (штуки, pieces) - requires grammovka
-    piece_units = ["штука", "штуки", "штук", "шт", "piece", "pieces", "pc", "pcs"]
-    if unit_lower in piece_units:
-        if product_info and product_info.get("grammovka"):
-            grammovka = product_info["grammovka"]
-            grams = int(value * grammovka)
-            display = f"{grams}g ({int(value)} pieces)"
+        # Case 1: Weight-based units (direct conversion)
+        if kind == "weight":
+            grams = int(value * multiplier)
+            display = f"{grams}g ({value}{suffix})" if suffix else f"{grams}g"
             return (grams, display)
-        else:
-            # No grammovka - assume piece-based product, store as units
-            # For piece-based products, we store the count directly
-            return (int(value), f"{int(value)} pieces")
 
-    # Case 3: Package-based units (коробки, пачки, упаковки)
-    package_units = ["коробка", "коробки", "коробок", "box", "boxes"]
-    pack_units = ["пачка", "пачки", "пачек", "pack", "packs"]
-    package_units_all = package_units + pack_units
+        # Case 2: Piece-based units (штуки, pieces) - requires grammovka
+        if kind == "piece":
+            if product_info and product_info.get("grammovka"):
+                grammovka = product_info["grammovka"]
+                grams = int(value * grammovka)
+                display = f"{grams}g ({int(value)} pieces)"
+                return (grams, display)
+            else:
+                # No grammovka - assume piece-based product, store as units
+                # For piece-based products, we store the count directly
+                return (int(value), f"{int(value)} pieces")
 
-    if unit_lower in package_units_all:
+        # Case 3: Package-based units (коробки, пачки, упаковки)
         if product_info and product_info.get("quantity_per_package"):
             qty_per_package = product_info["quantity_per_package"]
             total_pieces = int(value * qty_per_package)
@@ -166,13 +186,13 @@ def format_quantity(
         "300g (3 pieces)"
     """
     # Case 1: Piece-based display with grammovka
-    if display_unit in ["pieces", "штуки", "шт"] and product_info and product_info.get("grammovka"):
+    if display_unit in _PIECE_DISPLAY_UNITS and product_info and product_info.get("grammovka"):
         grammovka = product_info["grammovka"]
         pieces = grams // grammovka
         return f"{grams}g ({pieces} pieces)"
 
     # Case 2: Kilogram display
-    if display_unit in ["kg", "кг"] or grams >= 1000:
+    if display_unit in _KG_DISPLAY_UNITS or grams >= 1000:
         kg = grams / 1000
         if kg == int(kg):
             return f"{int(kg)}kg"
@@ -219,8 +239,7 @@ def parse_quantity_input(input_str: str) -> Tuple[Optional[float], Optional[str]
 
     elif len(parts) == 1:
         # Format: "5kg" or "100g" - need to separate number from unit
-        import re
-        match = re.match(r'^([\d.]+)\s*([a-zA-Zа-яА-Я]+)$', input_str)
+        match = _QTY_RE.match(input_str)
         if match:
             try:
                 value = float(match.group(1))
@@ -232,6 +251,24 @@ def parse_quantity_input(input_str: str) -> Tuple[Optional[float], Optional[str]
     return (None, None)
 
 
+# Base storage unit per product category; unknown categories default to grams
+_CATEGORY_BASE_UNIT: Dict[str, str] = {
+    # Weight-based categories (stored in grams)
+    "OUR_CHOCOLATE": "grams",  # With grammovka conversion
+    "CHOCOLATE_INGREDIENTS": "grams",
+    "CHINESE_TEA": "grams",
+    "BEVERAGES_COFFEE": "grams",
+    # Piece-based categories (stored as units)
+    "SHOP_MERCHANDISE": "pieces",
+    "HOUSEHOLD_ITEMS": "pieces",  # Can vary by product
+    "CHOCOLATE_PACKAGING": "pieces",
+    "OTHER_PACKAGING": "pieces",
+    "PRINTING_MATERIALS": "pieces",
+    "AI_EXPENSES": "pieces",
+    "EQUIPMENT_MATERIALS": "pieces",
+}
+
+
 def get_base_unit_for_category(category: str) -> str:
     """
     Get the base storage unit for a product category.
@@ -242,32 +279,7 @@ def get_base_unit_for_category(category: str) -> str:
     Returns:
         Base unit ("grams" or "pieces")
     """
-    # Weight-based categories (stored in grams)
-    weight_based = [
-        "OUR_CHOCOLATE",  # With grammovka conversion
-        "CHOCOLATE_INGREDIENTS",
-        "CHINESE_TEA",
-        "BEVERAGES_COFFEE",
-    ]
-
-    # Piece-based categories (stored as units)
-    piece_based = [
-        "SHOP_MERCHANDISE",
-        "HOUSEHOLD_ITEMS",  # Can vary by product
-        "CHOCOLATE_PACKAGING",
-        "OTHER_PACKAGING",
-        "PRINTING_MATERIALS",
-        "AI_EXPENSES",
-        "EQUIPMENT_MATERIALS",
-    ]
-
-    if category in weight_based:
-        return "grams"
-    elif category in piece_based:
-        return "pieces"
-    else:
-        # Default to grams
-        return "grams"
+    return _CATEGORY_BASE_UNIT.get(category, "grams")
 
 
 # ============================================
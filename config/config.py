@@ -5,8 +5,10 @@ Loads environment variables and provides typed settings
 
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
-from typing import List, Optional
+from typing import Optional
 from pathlib import Path
+from functools import cached_property, lru_cache
+import json
 import os
 
 
@@ -17,18 +19,25 @@ class Settings(BaseSettings):
     # TELEGRAM
     # ============================================
     telegram_bot_token: str = Field(..., env="TELEGRAM_BOT_TOKEN")
+    # Comma-separated string; kept as str so pydantic-settings doesn't
+    # JSON-decode it (a single ID would arrive as a bare int)
     admin_telegram_ids: str = Field(..., env="ADMIN_TELEGRAM_IDS")
 
     @field_validator("admin_telegram_ids")
     @classmethod
-    def parse_admin_ids(cls, v: str) -> List[int]:
-        """Parse comma-separated admin IDs"""
-        return [int(id.strip()) for id in v.split(",") if id.strip()]
+    def parse_admin_ids(cls, v: str) -> str:
+        """Fail fast on non-numeric admin IDs"""
+        for id in v.split(","):
+            if id.strip():
+                int(id.strip())
+        return v
 
     # ============================================
     # DATABASE
     # ============================================
     database_url: str = Field(..., env="DATABASE_URL")
+    # Set once the catalog is seeded: skips the seeder (and its connections)
+    database_seeded: bool = Field(default=False, env="DATABASE_SEEDED")
 
     # ============================================
     # SQUARE API (OPTIONAL)
@@ -100,20 +109,27 @@ class Settings(BaseSettings):
         case_sensitive = False
 
     def validate_paths(self) -> None:
-        """Ensure required directories exist"""
-        # Create logs directory (skip if filesystem is read-only, e.g. in Railway)
-        try:
-            log_dir = Path(self.log_file).parent
-            log_dir.mkdir(parents=True, exist_ok=True)
-        except (OSError, PermissionError) as e:
-            print(f"⚠️  Could not create log directory (using stdout only): {e}")
-
+        """
+        Warn about missing files. Called once at bot startup, not on import;
+        the log directory is created by setup_logger when the file sink opens.
+        """
         # Check Google credentials file
         if self.google_credentials_file:
             creds_path = Path(self.google_credentials_file)
             if not creds_path.exists():
                 print(f"⚠️  Google credentials file not found: {self.google_credentials_file}")
 
+    @cached_property
+    def google_credentials_info(self) -> Optional[dict]:
+        """
+        Parsed Google service account JSON, read on first access only.
+        Deployments without Sheets never touch the credentials file.
+        """
+        if not self.google_credentials_file:
+            return None
+        with open(self.google_credentials_file, encoding="utf-8") as f:
+            return json.load(f)
+
     @property
     def is_production(self) -> bool:
         """Check if running in production"""
@@ -125,16 +141,22 @@ class Settings(BaseSettings):
         return self.environment.lower() == "development"
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings once (.env read + validation) and return the cached instance"""
+    try:
+        loaded = Settings()
+    except Exception as e:
+        print(f"❌ Error loading configuration: {e}")
+        print("Make sure you have created a .env file with all required variables")
+        print("See .env.example for reference")
+        raise
+    return loaded
+
+
 # Global settings instance
-try:
-    settings = Settings()
-    settings.validate_paths()
-except Exception as e:
-    print(f"❌ Error loading configuration: {e}")
-    print("Make sure you have created a .env file with all required variables")
-    print("See .env.example for reference")
-    raise
+settings = get_settings()
 
 
 # Export for convenience
-__all__ = ["settings", "Settings"]
+__all__ = ["settings", "Settings", "get_settings"]
@@ -0,0 +1,9 @@
+"""
+Declarative base shared by all ORM models
+"""
+
+from sqlalchemy.orm import DeclarativeBase
+
+
+class Base(DeclarativeBase):
+    """Declarative base for all models (SQLAlchemy 2.x)"""
@@ -2,31 +2,59 @@
 Database connection and session management
 """
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import text
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+import re
+import orjson
+from datetime import date, datetime, timezone
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection, AsyncSession, async_sessionmaker
+from sqlalchemy import insert, inspect, text
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncGenerator, Iterable, Optional
 from loguru import logger
 
 from config.config import settings
-from database.models import Base
+
+# Matches the plain postgres:// and postgresql:// schemes (not already-async URLs)
+_ASYNC_URL_RE = re.compile(r"^postgres(?:ql)?://")
+
 
 def get_async_database_url(url: str) -> str:
     """Convert PostgreSQL URL to async format"""
-    if url.startswith("postgres://"):
-        url = url.replace("postgres://", "postgresql+asyncpg://", 1)
-    elif url.startswith("postgresql://"):
-        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-    return url
+    return _ASYNC_URL_RE.sub("postgresql+asyncpg://", url, count=1)
 
 # Create async engine
 DATABASE_URL = get_async_database_url(settings.database_url)
+
+# asyncpg tuning: bigger statement caches so hot ORM queries stay prepared,
+# and no JIT (it only adds planning overhead for short OLTP queries).
+# Enum columns are VARCHAR (no per-type OID introspection) and asyncpg already
+# uses binary codecs for uuid, so no custom connection_class is needed.
+ASYNCPG_CONNECT_ARGS = {
+    "statement_cache_size": 2048,
+    "prepared_statement_cache_size": 512,
+    "server_settings": {"jit": "off", "application_name": "chocobot"},
+}
+
+def _orjson_dumps(obj) -> str:
+    """JSON serializer for the engine (SQLAlchemy expects str, orjson returns bytes)"""
+    return orjson.dumps(obj).decode()
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=settings.log_level == "DEBUG",
+    poolclass=AsyncAdaptedQueuePool,
     pool_pre_ping=True,
     pool_size=20,
     max_overflow=10,
+    pool_timeout=30,  # fail a checkout instead of hanging a handler forever
+    pool_recycle=1800,
+    pool_reset_on_return="rollback",
+    connect_args=ASYNCPG_CONNECT_ARGS if DATABASE_URL.startswith("postgresql+asyncpg") else {},
+    # JSONB columns (audit_log old/new_data, role_permissions) via orjson
+    json_serializer=_orjson_dumps,
+    json_deserializer=orjson.loads,
 )
 
 # Create async session factory
@@ -38,27 +66,124 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Append-only log tables declared with postgresql_partition_by="RANGE (created_at)"
+PARTITIONED_TABLES = ("transaction_logs", "audit_log")
+
+
+def _add_months(month: date, n: int) -> date:
+    """First day of the month n months after `month`"""
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int = 1) -> None:
+    """
+    Create monthly partitions (current month + `months_ahead`) and a DEFAULT
+    partition for each partitioned log table. Idempotent; old months are
+    removed by dropping their partition instead of DELETE.
+    """
+    # Only tables that really are partitioned (relkind 'p'): on a database
+    # not yet through migration 0006 they are plain tables and
+    # CREATE ... PARTITION OF would fail
+    partitioned = (await conn.execute(
+        text("SELECT relname FROM pg_class WHERE relkind = 'p' AND relname = ANY(:names)"),
+        {"names": list(PARTITIONED_TABLES)},
+    )).scalars().all()
+
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    for table in partitioned:
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+        ))
+        for n in range(months_ahead + 1):
+            start = _add_months(this_month, n)
+            end = _add_months(start, 1)
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00')"
+            ))
+
+
+async def maintain_partitions() -> None:
+    """Run ensure_partitions in its own transaction (for the periodic job)"""
+    async with engine.begin() as conn:
+        await ensure_partitions(conn)
+
+
+# alembic.ini at the project root (script_location points at ./alembic)
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def _current_revision(sync_conn) -> Optional[str]:
+    """Alembic revision the database is stamped at (None if unversioned)"""
+    return MigrationContext.configure(sync_conn).get_current_revision()
+
+
+def _upgrade_schema(sync_conn) -> None:
+    """
+    Run `alembic upgrade head` on this connection (inside init_db's
+    transaction, so a failed migration leaves nothing half-applied).
+    """
+    from alembic import command
+    from alembic.config import Config
+    from database.models import SCHEMA_VERSION
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = sync_conn
+
+    inspector = inspect(sync_conn)
+    if _current_revision(sync_conn) is None and inspector.has_table("products"):
+        # Tables made by create_all before migrations ran at startup:
+        # at head if the satang money columns exist, else the 0000 baseline
+        columns = {c["name"] for c in inspector.get_columns("products")}
+        baseline = SCHEMA_VERSION if "retail_price_satang" in columns else "0000_initial_schema"
+        logger.info("Stamping pre-alembic database at {}", baseline)
+        command.stamp(config, baseline)
+
+    command.upgrade(config, "head")
+
+
 async def init_db() -> None:
     """
-    Initialize database.
-    CRITICAL FIX: Creates tables if they don't exist.
-    This solves the 'migration on empty DB' crash.
+    Initialize database: bring the schema to the latest alembic revision
+    (creating it from scratch on an empty database), then make sure the
+    log table partitions exist.
     """
+    # Imported here so engine/session users (scripts, health checks) don't pay
+    # for building the ORM mappers until the schema is actually needed
+    from database.models import SCHEMA_VERSION
+
     try:
         async with engine.begin() as conn:
             # 1. Enable UUID extension (often needed for Postgres)
             await conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
 
-            # 2. Create all tables defined in models.py
-            # This is safe: SQLAlchemy checks existence before creating
-            logger.info("⚡ Checking/Creating database tables...")
-            await conn.run_sync(Base.metadata.create_all)
-            logger.info("✅ Database schema verified/created.")
+            # 2. Warm start: already at head, skip loading the migration scripts
+            current = await conn.run_sync(_current_revision)
+            if current != SCHEMA_VERSION:
+                logger.info("⚡ Migrating database schema {} -> {}...", current or "empty", SCHEMA_VERSION)
+                await conn.run_sync(_upgrade_schema)
+
+            # 3. Monthly partitions for the log tables
+            await ensure_partitions(conn)
+            logger.info("✅ Database schema up to date ({}).", SCHEMA_VERSION)
 
     except Exception as e:
         logger.critical(f"❌ Database initialization failed: {e}")
         raise e
 
+async def warm_up_pool(connections: int = 4) -> None:
+    """
+    Open a few pooled connections up front so the first updates after a
+    (re)start reuse warm connections instead of paying connect + auth cost.
+    """
+    # All opened connections are closed (returned to the pool) on exit,
+    # including when a later connect() fails
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            await stack.enter_async_context(engine.connect())
+    logger.info(f"Database pool warmed up with {connections} connections")
+
 async def close_db() -> None:
     """Close database connections"""
     await engine.dispose()
@@ -76,6 +201,33 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+@asynccontextmanager
+async def get_db_readonly() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for handlers that only SELECT.
+    Skips the flush/COMMIT of get_db(); the implicit transaction is simply
+    released when the session closes.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+async def bulk_insert(
+    session: AsyncSession, model, rows: Iterable[dict], chunk_size: int = 10_000
+) -> None:
+    """
+    Insert many rows with one executemany per chunk (seed fixtures, imports).
+    Plain dicts skip ORM instance state/identity-map work per row; rows may
+    be a generator, only `chunk_size` of them are held in memory at once.
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            await session.execute(insert(model), batch)
+            batch = []
+    if batch:
+        await session.execute(insert(model), batch)
+
 async def get_db_session() -> AsyncSession:
     """Get a new database session (for use with FastAPI dependency injection)"""
     async with AsyncSessionLocal() as session:
@@ -4,19 +4,24 @@ These models match the PostgreSQL schema defined in schema.sql
 """
 
 from sqlalchemy import (
-    Column, String, Integer, Float, Boolean, DateTime, Date,
-    ForeignKey, Enum as SQLEnum, Text, DECIMAL, BigInteger, CheckConstraint
+    Column, String, Integer, Boolean, DateTime, Date,
+    ForeignKey, Enum as SQLEnum, Text, DECIMAL, BigInteger, CheckConstraint,
+    Index, text
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum as PyEnum
-import uuid
 
+from database.base import Base
 
-Base = declarative_base()
+
+# Latest alembic revision: init_db runs `upgrade head` when the database
+# is stamped at anything else. Bump together with every new migration.
+SCHEMA_VERSION = "0009_square_sync_idempotency_key"
 
 
 # ============================================
@@ -50,6 +55,10 @@ class ProductCategory(str, PyEnum):
     EQUIPMENT_MATERIALS = "EQUIPMENT_MATERIALS"  # ⚙️ Оборудование и сопутствующие материалы
 
 
+# For validating raw category strings (callback data) without building an enum
+PRODUCT_CATEGORY_VALUES = frozenset(m.value for m in ProductCategory)
+
+
 class IngredientCategory(str, PyEnum):
     CACAO_BASE = "CACAO_BASE"
     NUTS_SEEDS = "NUTS_SEEDS"
@@ -126,6 +135,38 @@ class TransactionActionType(str, PyEnum):
     CORRECTION = "CORRECTION"  # Manual inventory correction
 
 
+def string_enum(enum_cls: type, table: str, column: str) -> SQLEnum:
+    """
+    Enum column stored as VARCHAR + CHECK instead of a native PostgreSQL ENUM.
+    No CREATE TYPE / pg_type lookups, and adding a value doesn't need ALTER TYPE.
+    The CHECK is named ck_<table>_<column>_enum, as in migration 0003.
+    """
+    return SQLEnum(
+        enum_cls, native_enum=False, length=32, create_constraint=True,
+        name=f"ck_{table}_{column}_enum",
+    )
+
+
+def satang_as_thb(satang_attr: str) -> hybrid_property:
+    """
+    THB view of an integer satang column (1 THB = 100 satang).
+    Readable, writable (constructor kwargs too) and usable in queries, so
+    callers keep working with *_thb while rows hold plain ints.
+    """
+    def fget(self):
+        value = getattr(self, satang_attr)
+        # Decimal with two places: exact money arithmetic, renders as 120.00
+        return None if value is None else Decimal(value).scaleb(-2)
+
+    def fset(self, value):
+        setattr(self, satang_attr, None if value is None else int(round(value * 100)))
+
+    def expr(cls):
+        return getattr(cls, satang_attr) / 100
+
+    return hybrid_property(fget, fset, expr=expr)
+
+
 # ============================================
 # MODELS
 # ============================================
@@ -133,28 +174,31 @@ class TransactionActionType(str, PyEnum):
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
     username = Column(String(255))
     first_name = Column(String(255))
     last_name = Column(String(255))
-    role = Column(SQLEnum(UserRole), nullable=False, default=UserRole.STAFF)
-    status = Column(SQLEnum(UserStatus), nullable=False, default=UserStatus.ACTIVE)
+    role = Column(string_enum(UserRole, "users", "role"), nullable=False, default=UserRole.STAFF)
+    status = Column(string_enum(UserStatus, "users", "status"), nullable=False, default=UserStatus.ACTIVE)
     is_admin = Column(Boolean, default=False)  # Admin flag for special permissions
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login = Column(DateTime(timezone=True))
 
     # Relationships
-    sales = relationship("Sale", back_populates="creator")
-    productions = relationship("Production", back_populates="creator")
-    purchases = relationship("Purchase", back_populates="creator")
+    # One-to-many collections use lazy="raise": an AsyncSession cannot lazy-load,
+    # so an un-eager-loaded access fails with a clear error instead of an N+1 /
+    # MissingGreenlet. Load them explicitly with selectinload() where needed.
+    sales = relationship("Sale", back_populates="creator", lazy="raise")
+    productions = relationship("Production", back_populates="creator", lazy="raise")
+    purchases = relationship("Purchase", back_populates="creator", lazy="raise")
 
 
 class RolePermission(Base):
     __tablename__ = "role_permissions"
 
-    role = Column(SQLEnum(UserRole), primary_key=True)
+    role = Column(string_enum(UserRole, "role_permissions", "role"), primary_key=True)
     permissions = Column(JSONB, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -162,14 +206,16 @@ class RolePermission(Base):
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     sku = Column(String(50), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=False)
-    category = Column(SQLEnum(ProductCategory), nullable=False, index=True)
+    category = Column(string_enum(ProductCategory, "products", "category"), nullable=False, index=True)
     weight_g = Column(DECIMAL(8, 2))
     cocoa_percent = Column(String(20))
-    retail_price_thb = Column(DECIMAL(10, 2), nullable=False)
-    cogs_thb = Column(DECIMAL(10, 2), nullable=False)
+    retail_price_satang = Column(BigInteger, nullable=False)
+    cogs_satang = Column(BigInteger, nullable=False)
+    retail_price_thb = satang_as_thb("retail_price_satang")
+    cogs_thb = satang_as_thb("cogs_satang")
     square_item_id = Column(String(255))
     is_active = Column(Boolean, default=True)
     notes = Column(Text)
@@ -184,20 +230,28 @@ class Product(Base):
 
     # Relationships
     inventory = relationship("InventoryProduct", back_populates="product", uselist=False)
-    sales = relationship("Sale", back_populates="product")
-    productions = relationship("Production", back_populates="product")
-    transaction_logs = relationship("TransactionLog", back_populates="product")
+    sales = relationship("Sale", back_populates="product", lazy="raise")
+    productions = relationship("Production", back_populates="product", lazy="raise")
+    transaction_logs = relationship("TransactionLog", back_populates="product", lazy="raise")
+
+    @property
+    def margin_pct(self):
+        """Gross margin in percent of retail price"""
+        if not self.retail_price_satang:
+            return 0
+        return (self.retail_price_satang - self.cogs_satang) / self.retail_price_satang * 100
 
 
 class Ingredient(Base):
     __tablename__ = "ingredients"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     code = Column(String(50), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=False)
-    category = Column(SQLEnum(IngredientCategory), nullable=False)
-    price_per_unit_thb = Column(DECIMAL(10, 2), nullable=False)
-    unit = Column(SQLEnum(IngredientUnit), nullable=False)
+    category = Column(string_enum(IngredientCategory, "ingredients", "category"), nullable=False)
+    price_per_unit_satang = Column(BigInteger, nullable=False)
+    price_per_unit_thb = satang_as_thb("price_per_unit_satang")
+    unit = Column(string_enum(IngredientUnit, "ingredients", "unit"), nullable=False)
     supplier = Column(String(255))
     notes = Column(Text)
     is_active = Column(Boolean, default=True)
@@ -206,14 +260,14 @@ class Ingredient(Base):
 
     # Relationships
     inventory = relationship("InventoryIngredient", back_populates="ingredient", uselist=False)
-    purchases = relationship("Purchase", back_populates="ingredient")
-    production_usages = relationship("ProductionIngredientUsed", back_populates="ingredient")
+    purchases = relationship("Purchase", back_populates="ingredient", lazy="raise")
+    production_usages = relationship("ProductionIngredientUsed", back_populates="ingredient", lazy="raise")
 
 
 class InventoryProduct(Base):
     __tablename__ = "inventory_products"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"))
     quantity = Column(Integer, nullable=False, default=0)
     min_stock_level = Column(Integer, default=10)
@@ -231,7 +285,7 @@ class InventoryProduct(Base):
 class InventoryIngredient(Base):
     __tablename__ = "inventory_ingredients"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     ingredient_id = Column(UUID(as_uuid=True), ForeignKey("ingredients.id", ondelete="CASCADE"))
     quantity_kg = Column(DECIMAL(12, 3), nullable=False, default=0)
     min_stock_level_kg = Column(DECIMAL(12, 3), default=1)
@@ -250,22 +304,31 @@ class InventoryIngredient(Base):
 class Sale(Base):
     __tablename__ = "sales"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="RESTRICT"))
     quantity = Column(Integer, nullable=False)
-    unit_price_thb = Column(DECIMAL(10, 2), nullable=False)
-    discount_thb = Column(DECIMAL(10, 2), default=0)
-    final_price_thb = Column(DECIMAL(10, 2))
-    source = Column(SQLEnum(SaleSource), nullable=False, default=SaleSource.TELEGRAM_BOT)
-    payment_method = Column(SQLEnum(PaymentMethod))
+    unit_price_satang = Column(BigInteger, nullable=False)
+    discount_satang = Column(BigInteger, default=0)
+    final_price_satang = Column(BigInteger)
+    unit_price_thb = satang_as_thb("unit_price_satang")
+    discount_thb = satang_as_thb("discount_satang")
+    final_price_thb = satang_as_thb("final_price_satang")
+    source = Column(string_enum(SaleSource, "sales", "source"), nullable=False, default=SaleSource.TELEGRAM_BOT)
+    payment_method = Column(string_enum(PaymentMethod, "sales", "payment_method"))
     square_transaction_id = Column(String(255))
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     customer_name = Column(String(255))
     customer_telegram_id = Column(BigInteger)
     notes = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())  # indexed via ix_sales_created_product
 
-    __table_args__ = (CheckConstraint("quantity > 0", name="positive_quantity_sale"),)
+    __table_args__ = (
+        CheckConstraint("quantity > 0", name="positive_quantity_sale"),
+        # "sales of product P, newest first" as a single range scan
+        Index("ix_sales_prod_time", "product_id", text("created_at DESC")),
+        # "all sales since T, newest first" (sheets sync, insights) joined on product_id
+        Index("ix_sales_created_product", text("created_at DESC"), "product_id"),
+    )
 
     # Relationships
     product = relationship("Product", back_populates="sales")
@@ -275,36 +338,44 @@ class Sale(Base):
 class Production(Base):
     __tablename__ = "production"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="RESTRICT"))
     batch_number = Column(String(100), unique=True)
     quantity_produced = Column(Integer, nullable=False)
     production_date = Column(Date, nullable=False, server_default=func.current_date())
-    status = Column(SQLEnum(ProductionStatus), nullable=False, default=ProductionStatus.PLANNED, index=True)
-    cost_materials_thb = Column(DECIMAL(10, 2))
-    cost_labor_thb = Column(DECIMAL(10, 2))
-    total_cost_thb = Column(DECIMAL(10, 2))
+    status = Column(string_enum(ProductionStatus, "production", "status"), nullable=False, default=ProductionStatus.PLANNED, index=True)
+    cost_materials_satang = Column(BigInteger)
+    cost_labor_satang = Column(BigInteger)
+    total_cost_satang = Column(BigInteger)
+    cost_materials_thb = satang_as_thb("cost_materials_satang")
+    cost_labor_thb = satang_as_thb("cost_labor_satang")
+    total_cost_thb = satang_as_thb("total_cost_satang")
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
 
-    __table_args__ = (CheckConstraint("quantity_produced > 0", name="positive_quantity_prod"),)
+    __table_args__ = (
+        CheckConstraint("quantity_produced > 0", name="positive_quantity_prod"),
+        # ORDER BY production_date DESC LIMIT 100 (sheets sync)
+        Index("ix_production_date", text("production_date DESC")),
+    )
 
     # Relationships
     product = relationship("Product", back_populates="productions")
     creator = relationship("User", back_populates="productions")
-    ingredients_used = relationship("ProductionIngredientUsed", back_populates="production")
+    ingredients_used = relationship("ProductionIngredientUsed", back_populates="production", lazy="raise")
 
 
 class ProductionIngredientUsed(Base):
     __tablename__ = "production_ingredients_used"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     production_id = Column(UUID(as_uuid=True), ForeignKey("production.id", ondelete="CASCADE"))
     ingredient_id = Column(UUID(as_uuid=True), ForeignKey("ingredients.id", ondelete="RESTRICT"))
     quantity_used_kg = Column(DECIMAL(12, 3), nullable=False)
-    cost_thb = Column(DECIMAL(10, 2))
+    cost_satang = Column(BigInteger)
+    cost_thb = satang_as_thb("cost_satang")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -315,21 +386,26 @@ class ProductionIngredientUsed(Base):
 class Purchase(Base):
     __tablename__ = "purchases"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     ingredient_id = Column(UUID(as_uuid=True), ForeignKey("ingredients.id", ondelete="RESTRICT"))
     quantity_kg = Column(DECIMAL(12, 3), nullable=False)
-    unit_price_thb = Column(DECIMAL(10, 2), nullable=False)
+    unit_price_satang = Column(BigInteger, nullable=False)
+    unit_price_thb = satang_as_thb("unit_price_satang")
     supplier = Column(String(255))
     purchase_date = Column(Date, nullable=False, server_default=func.current_date())
     expected_delivery_date = Column(Date)
-    status = Column(SQLEnum(PurchaseStatus), nullable=False, default=PurchaseStatus.ORDERED, index=True)
+    status = Column(string_enum(PurchaseStatus, "purchases", "status"), nullable=False, default=PurchaseStatus.ORDERED, index=True)
     invoice_number = Column(String(100))
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     received_at = Column(DateTime(timezone=True))
 
-    __table_args__ = (CheckConstraint("quantity_kg > 0", name="positive_quantity_purch"),)
+    __table_args__ = (
+        CheckConstraint("quantity_kg > 0", name="positive_quantity_purch"),
+        # ORDER BY purchase_date DESC LIMIT 100 (sheets sync)
+        Index("ix_purchases_date", text("purchase_date DESC")),
+    )
 
     # Relationships
     ingredient = relationship("Ingredient", back_populates="purchases")
@@ -339,23 +415,25 @@ class Purchase(Base):
 class SquareSyncLog(Base):
     __tablename__ = "square_sync_log"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    sync_type = Column(SQLEnum(SyncType), nullable=False)
-    sync_status = Column(SQLEnum(SyncStatus), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
+    sync_type = Column(string_enum(SyncType, "square_sync_log", "sync_type"), nullable=False)
+    sync_status = Column(string_enum(SyncStatus, "square_sync_log", "sync_status"), nullable=False)
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
     records_synced = Column(Integer)
     error_message = Column(Text)
+    # Prefix of the Square idempotency keys sent by this run (for correlating retries)
+    idempotency_key = Column(String(255))
     triggered_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
 
 
 class SheetsSyncLog(Base):
     __tablename__ = "sheets_sync_log"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     sheet_name = Column(String(255), nullable=False)
     sync_direction = Column(String(20))
-    sync_status = Column(SQLEnum(SyncStatus), nullable=False)
+    sync_status = Column(string_enum(SyncStatus, "sheets_sync_log", "sync_status"), nullable=False)
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
     records_synced = Column(Integer)
@@ -365,16 +443,19 @@ class SheetsSyncLog(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_log"
+    # Monthly RANGE partitions, created by database.db.ensure_partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
-    action = Column(SQLEnum(ActionType), nullable=False)
+    action = Column(string_enum(ActionType, "audit_log", "action"), nullable=False)
     table_name = Column(String(100), nullable=False)
     record_id = Column(UUID(as_uuid=True))
     old_data = Column(JSONB)
     new_data = Column(JSONB)
     ip_address = Column(INET)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Partition key has to be part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
 
 
 class TransactionLog(Base):
@@ -383,25 +464,33 @@ class TransactionLog(Base):
     Records all ADD, CONSUME, and CORRECTION actions with full audit trail.
     """
     __tablename__ = "transaction_logs"
+    __table_args__ = (
+        # "last N transactions for user X" as a single range scan
+        Index("ix_txlog_user_time", "telegram_user_id", text("created_at DESC")),
+        # Also serves plain product_id lookups (leading column)
+        Index("ix_txlog_prod_cat", "product_id", "category"),
+        # Monthly RANGE partitions, created by database.db.ensure_partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("uuid_generate_v4()"))
 
     # User information (from Telegram)
-    telegram_user_id = Column(BigInteger, nullable=False, index=True)  # Telegram user ID
+    telegram_user_id = Column(BigInteger, nullable=False)  # Telegram user ID (indexed via ix_txlog_user_time)
     user_name = Column(String(255), nullable=False)  # @username or selected name [Thei][Nu][Choco]
 
     # Product information
-    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="RESTRICT"), nullable=False, index=True)
-    product_name = Column(String(255), nullable=False)  # Denormalized for historical record
-    category = Column(SQLEnum(ProductCategory), nullable=False)  # Denormalized for historical record
+    # Product name comes from the join on product_id (see the product relationship)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="RESTRICT"), nullable=False)  # indexed via ix_txlog_prod_cat
+    category = Column(string_enum(ProductCategory, "transaction_logs", "category"), nullable=False)  # Denormalized for historical record
 
     # Transaction details
-    action_type = Column(SQLEnum(TransactionActionType), nullable=False, index=True)
+    action_type = Column(string_enum(TransactionActionType, "transaction_logs", "action_type"), nullable=False, index=True)
 
     # Quantity tracking (all quantities stored in GRAMS as base unit)
-    quantity_original = Column(Float, nullable=False)  # User input value (e.g., 5.0 for "5 kg")
+    quantity_original = Column(DECIMAL(12, 3), nullable=False)  # User input value (e.g., 5.0 for "5 kg")
     quantity_unit = Column(String(50), nullable=False)  # Original unit (e.g., "kg", "pieces", "г")
-    quantity_grams = Column(Integer, nullable=False)  # Stored quantity in grams (base unit)
+    quantity_grams = Column(BigInteger, nullable=False)  # Stored quantity in grams (base unit)
     quantity_display = Column(String(100))  # Human-readable format (e.g., "5000g" or "5kg" or "100 pieces")
 
     # Additional information
@@ -410,7 +499,8 @@ class TransactionLog(Base):
     admin_flag = Column(Boolean, default=False)  # Whether this was recorded by admin user
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Partition key has to be part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
@@ -3,22 +3,54 @@ Google Sheets Integration
 Bidirectional sync with Google Sheets for reporting and data management
 """
 
-import gspread
+import httpx
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.oauth2.service_account import Credentials
 from loguru import logger
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List
 from datetime import datetime
 import asyncio
-from functools import partial
+from functools import lru_cache
 
 from config.config import settings
-from database.db import get_db
+from database.db import get_db_readonly
 from database.models import (
     Product, Ingredient, Sale, Production, Purchase,
     InventoryProduct, InventoryIngredient, SheetsSyncLog,
-    SyncStatus
+    SyncStatus, ProductCategory, PaymentMethod, SaleSource, ProductionStatus, PurchaseStatus
 )
-from sqlalchemy import select
+from sqlalchemy import select, func, cast, Numeric
+
+
+# Enum member -> cell text, built once (plain dict lookups in the row loops)
+_CATEGORY_TEXT = {m: m.value for m in ProductCategory}
+_PAYMENT_METHOD_TEXT = {m: m.value for m in PaymentMethod}
+_SALE_SOURCE_TEXT = {m: m.value for m in SaleSource}
+_PRODUCTION_STATUS_TEXT = {m: m.value for m in ProductionStatus}
+_PURCHASE_STATUS_TEXT = {m: m.value for m in PurchaseStatus}
+
+
+def _cell(value) -> Dict:
+    """CellData for a batchUpdate updateCells request"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def _header_format_request(sheet_id: int) -> Dict:
+    """repeatCell request that styles the header row (A1:Z1)"""
+    return {"repeatCell": {
+        "range": {
+            "sheetId": sheet_id,
+            "startRowIndex": 0, "endRowIndex": 1,
+            "startColumnIndex": 0, "endColumnIndex": 26,
+        },
+        "cell": {"userEnteredFormat": {
+            "backgroundColor": {"red": 0.2, "green": 0.5, "blue": 0.8},
+            "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
+        }},
+        "fields": "userEnteredFormat(backgroundColor,textFormat)",
+    }}
 
 
 class GoogleSheetsIntegration:
@@ -32,34 +64,46 @@ class GoogleSheetsIntegration:
                 'https://www.googleapis.com/auth/drive'
             ]
 
-            self.creds = Credentials.from_service_account_file(
-                settings.google_credentials_file,
+            self.creds = Credentials.from_service_account_info(
+                settings.google_credentials_info,
                 scopes=self.scopes
             )
 
-            self.client = gspread.authorize(self.creds)
-            self.spreadsheet = self.client.open_by_key(settings.google_sheet_id)
+            # One pooled HTTP/2 client for all Sheets REST calls (no executor threads,
+            # no handshake per request); nothing is fetched until the first sync
+            self.http = httpx.AsyncClient(http2=True, timeout=30)
+            self.api_url = f"https://sheets.googleapis.com/v4/spreadsheets/{settings.google_sheet_id}"
+            self._sheet_ids: Dict[str, int] = {}
 
             logger.info("Google Sheets API initialized")
 
         except Exception as e:
-            logger.error(f"Failed to initialize Google Sheets: {e}")
+            logger.error("Failed to initialize Google Sheets: {}", e)
             raise
 
     async def sync_all(self) -> Dict:
         """Sync all data to Google Sheets"""
         logger.info("Starting full sync to Google Sheets...")
 
+        # Independent sheets (each with its own DB session): overlap their
+        # DB queries and Google API calls instead of running them back to back
+        names = ("inventory", "sales", "production", "purchases")
+        outcomes = await asyncio.gather(
+            self.sync_inventory_to_sheets(),
+            self.sync_sales_to_sheets(),
+            self.sync_production_to_sheets(),
+            self.sync_purchases_to_sheets(),
+            return_exceptions=True,
+        )
         results = {
-            "inventory": await self.sync_inventory_to_sheets(),
-            "sales": await self.sync_sales_to_sheets(),
-            "production": await self.sync_production_to_sheets(),
-            "purchases": await self.sync_purchases_to_sheets()
+            name: outcome if not isinstance(outcome, BaseException)
+            else {"success": False, "error": str(outcome)}
+            for name, outcome in zip(names, outcomes)
         }
 
         sheets_updated = sum(1 for r in results.values() if r.get("success"))
 
-        logger.success(f"Full sync completed. Updated {sheets_updated} sheets.")
+        logger.success("Full sync completed. Updated {} sheets.", sheets_updated)
 
         return {
             "success": True,
@@ -70,9 +114,23 @@ class GoogleSheetsIntegration:
     async def sync_inventory_to_sheets(self) -> Dict:
         """Export current inventory to Google Sheets"""
         try:
-            async with get_db() as db:
-                # Get all products with inventory
-                stmt = select(Product, InventoryProduct).join(InventoryProduct)
+            async with get_db_readonly() as db:
+                # Price/margin formatting is done by PostgreSQL; rows come back ready
+                margin = func.round(
+                    cast(Product.retail_price_satang - Product.cogs_satang, Numeric)
+                    / func.nullif(Product.retail_price_satang, 0) * 100,
+                    1,
+                )
+                stmt = select(
+                    Product.sku,
+                    Product.name,
+                    Product.category,
+                    InventoryProduct.quantity,
+                    InventoryProduct.min_stock_level,
+                    func.to_char(Product.retail_price_thb, "FM9999999990.00"),
+                    func.to_char(Product.cogs_thb, "FM9999999990.00"),
+                    func.concat(func.to_char(func.coalesce(margin, 0), "FM9999990.0"), "%"),
+                ).join(InventoryProduct)
                 result = await db.execute(stmt)
                 products = result.all()
 
@@ -82,85 +140,92 @@ class GoogleSheetsIntegration:
                     "Retail Price", "COGS", "Margin %", "Last Updated"
                 ]
 
+                synced_at = datetime.now().strftime("%Y-%m-%d %H:%M")
                 rows = [headers]
-
-                for product, inventory in products:
-                    margin = ((product.retail_price_thb - product.cogs_thb) / product.retail_price_thb * 100)
-                    rows.append([
-                        product.sku,
-                        product.name,
-                        product.category.value,
-                        inventory.quantity,
-                        inventory.min_stock_level,
-                        f"{product.retail_price_thb:.2f}",
-                        f"{product.cogs_thb:.2f}",
-                        f"{margin:.1f}%",
-                        datetime.now().strftime("%Y-%m-%d %H:%M")
-                    ])
+                rows.extend(
+                    [sku, name, _CATEGORY_TEXT[category], qty, min_qty, price, cogs, margin_text, synced_at]
+                    for sku, name, category, qty, min_qty, price, cogs, margin_text in products
+                )
 
                 # Write to sheet
                 await self._write_to_sheet(settings.sheet_name_inventory, rows)
 
-                logger.info(f"Synced {len(products)} products to Inventory sheet")
+                logger.info("Synced {} products to Inventory sheet", len(products))
                 return {"success": True, "records": len(products)}
 
         except Exception as e:
-            logger.error(f"Failed to sync inventory: {e}")
+            logger.error("Failed to sync inventory: {}", e)
             return {"success": False, "error": str(e)}
 
     async def sync_sales_to_sheets(self) -> Dict:
         """Export sales records to Google Sheets"""
         try:
-            async with get_db() as db:
+            async with get_db_readonly() as db:
                 # Get recent sales (last 30 days)
                 from datetime import timedelta
                 since_date = datetime.now() - timedelta(days=30)
 
-                stmt = select(Sale).join(Product).where(
+                # Sale + Product in one result set (no per-row lookups)
+                stmt = select(Sale, Product).join(Product, Sale.product_id == Product.id).where(
                     Sale.created_at >= since_date
                 ).order_by(Sale.created_at.desc())
 
-                result = await db.execute(stmt)
-                sales = result.scalars().all()
+                # Server-side cursor: rows arrive 1000 at a time
+                result = await db.stream(stmt.execution_options(yield_per=1000))
 
-                # Prepare data
                 headers = [
                     "Date", "Time", "SKU", "Product", "Quantity",
                     "Unit Price", "Total", "Payment Method", "Source"
                 ]
 
-                rows = [headers]
-
-                for sale in sales:
-                    product = await db.get(Product, sale.product_id)
-                    rows.append([
-                        sale.created_at.strftime("%Y-%m-%d"),
-                        sale.created_at.strftime("%H:%M:%S"),
-                        product.sku if product else "N/A",
-                        product.name if product else "Unknown",
-                        sale.quantity,
-                        f"{sale.unit_price_thb:.2f}",
-                        f"{sale.final_price_thb:.2f}",
-                        sale.payment_method.value if sale.payment_method else "N/A",
-                        sale.source.value
-                    ])
-
-                await self._write_to_sheet(settings.sheet_name_sales, rows)
-
-                logger.info(f"Synced {len(sales)} sales to Sales sheet")
-                return {"success": True, "records": len(sales)}
+                async def _chunks():
+                    async for partition in result.partitions():
+                        yield [
+                            [
+                                sale.created_at.strftime("%Y-%m-%d"),
+                                sale.created_at.strftime("%H:%M:%S"),
+                                product.sku if product else "N/A",
+                                product.name if product else "Unknown",
+                                sale.quantity,
+                                f"{sale.unit_price_thb:.2f}",
+                                f"{sale.final_price_thb:.2f}",
+                                _PAYMENT_METHOD_TEXT.get(sale.payment_method, "N/A"),
+                                _SALE_SOURCE_TEXT[sale.source]
+                            ]
+                            for sale, product in partition
+                        ]
+
+                synced = await self._stream_to_sheet(settings.sheet_name_sales, headers, _chunks())
+
+                logger.info("Synced {} sales to Sales sheet", synced)
+                return {"success": True, "records": synced}
 
         except Exception as e:
-            logger.error(f"Failed to sync sales: {e}")
+            logger.error("Failed to sync sales: {}", e)
             return {"success": False, "error": str(e)}
 
     async def sync_production_to_sheets(self) -> Dict:
         """Export production records to Google Sheets"""
         try:
-            async with get_db() as db:
-                stmt = select(Production).order_by(Production.production_date.desc()).limit(100)
+            async with get_db_readonly() as db:
+                # Only the exported columns, as plain rows (no ORM instances)
+                stmt = (
+                    select(
+                        Production.production_date,
+                        Production.batch_number,
+                        Product.name,
+                        Production.quantity_produced,
+                        Production.status,
+                        Production.cost_materials_satang,
+                        Production.cost_labor_satang,
+                        Production.total_cost_satang,
+                    )
+                    .outerjoin(Product, Production.product_id == Product.id)
+                    .order_by(Production.production_date.desc())
+                    .limit(100)
+                )
                 result = await db.execute(stmt)
-                productions = result.scalars().all()
+                productions = result.all()
 
                 headers = [
                     "Date", "Batch #", "Product", "Quantity", "Status",
@@ -169,17 +234,16 @@ class GoogleSheetsIntegration:
 
                 rows = [headers]
 
-                for prod in productions:
-                    product = await db.get(Product, prod.product_id)
+                for date, batch, name, produced, status, materials, labor, total in productions:
                     rows.append([
-                        prod.production_date.strftime("%Y-%m-%d"),
-                        prod.batch_number or "N/A",
-                        product.name if product else "Unknown",
-                        prod.quantity_produced,
-                        prod.status.value,
-                        f"{prod.cost_materials_thb:.2f}" if prod.cost_materials_thb else "N/A",
-                        f"{prod.cost_labor_thb:.2f}" if prod.cost_labor_thb else "N/A",
-                        f"{prod.total_cost_thb:.2f}" if prod.total_cost_thb else "N/A"
+                        date.strftime("%Y-%m-%d"),
+                        batch or "N/A",
+                        name or "Unknown",
+                        produced,
+                        _PRODUCTION_STATUS_TEXT[status],
+                        f"{materials / 100:.2f}" if materials else "N/A",
+                        f"{labor / 100:.2f}" if labor else "N/A",
+                        f"{total / 100:.2f}" if total else "N/A"
                     ])
 
                 await self._write_to_sheet(settings.sheet_name_production, rows)
@@ -187,16 +251,29 @@ class GoogleSheetsIntegration:
                 return {"success": True, "records": len(productions)}
 
         except Exception as e:
-            logger.error(f"Failed to sync production: {e}")
+            logger.error("Failed to sync production: {}", e)
             return {"success": False, "error": str(e)}
 
     async def sync_purchases_to_sheets(self) -> Dict:
         """Export purchase records to Google Sheets"""
         try:
-            async with get_db() as db:
-                stmt = select(Purchase).order_by(Purchase.purchase_date.desc()).limit(100)
+            async with get_db_readonly() as db:
+                # Only the exported columns, as plain rows (no ORM instances)
+                stmt = (
+                    select(
+                        Purchase.purchase_date,
+                        Ingredient.name,
+                        Purchase.quantity_kg,
+                        Purchase.unit_price_satang,
+                        Purchase.supplier,
+                        Purchase.status,
+                    )
+                    .outerjoin(Ingredient, Purchase.ingredient_id == Ingredient.id)
+                    .order_by(Purchase.purchase_date.desc())
+                    .limit(100)
+                )
                 result = await db.execute(stmt)
-                purchases = result.scalars().all()
+                purchases = result.all()
 
                 headers = [
                     "Date", "Ingredient", "Quantity (kg)", "Unit Price",
@@ -205,16 +282,16 @@ class GoogleSheetsIntegration:
 
                 rows = [headers]
 
-                for purchase in purchases:
-                    ingredient = await db.get(Ingredient, purchase.ingredient_id)
+                for date, name, quantity_kg, unit_price_satang, supplier, status in purchases:
+                    unit_price = unit_price_satang / 100
                     rows.append([
-                        purchase.purchase_date.strftime("%Y-%m-%d"),
-                        ingredient.name if ingredient else "Unknown",
-                        f"{purchase.quantity_kg:.2f}",
-                        f"{purchase.unit_price_thb:.2f}",
-                        f"{purchase.quantity_kg * purchase.unit_price_thb:.2f}",
-                        purchase.supplier or "N/A",
-                        purchase.status.value
+                        date.strftime("%Y-%m-%d"),
+                        name or "Unknown",
+                        f"{quantity_kg:.2f}",
+                        f"{unit_price:.2f}",
+                        f"{float(quantity_kg) * unit_price:.2f}",
+                        supplier or "N/A",
+                        _PURCHASE_STATUS_TEXT[status]
                     ])
 
                 await self._write_to_sheet(settings.sheet_name_purchases, rows)
@@ -222,44 +299,122 @@ class GoogleSheetsIntegration:
                 return {"success": True, "records": len(purchases)}
 
         except Exception as e:
-            logger.error(f"Failed to sync purchases: {e}")
+            logger.error("Failed to sync purchases: {}", e)
             return {"success": False, "error": str(e)}
 
-    async def _write_to_sheet(self, sheet_name: str, data: List[List]):
-        """Write data to a specific sheet (create if doesn't exist)"""
-        loop = asyncio.get_event_loop()
-
-        def _sync_write():
-            try:
-                # Try to get existing sheet
-                try:
-                    worksheet = self.spreadsheet.worksheet(sheet_name)
-                except gspread.exceptions.WorksheetNotFound:
-                    # Create new sheet
-                    worksheet = self.spreadsheet.add_worksheet(
-                        title=sheet_name,
-                        rows=len(data) + 100,
-                        cols=len(data[0]) if data else 10
-                    )
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Bearer token for the service account (refreshed in a thread when expired)"""
+        if not self.creds.valid:
+            await asyncio.to_thread(self.creds.refresh, GoogleAuthRequest())
+        return {"Authorization": f"Bearer {self.creds.token}"}
+
+    async def _batch_update(self, requests: List[Dict]) -> Dict:
+        """POST spreadsheets.batchUpdate (one HTTP request for all `requests`)"""
+        response = await self.http.post(
+            f"{self.api_url}:batchUpdate", json={"requests": requests}, headers=await self._auth_headers()
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_sheet_id(self, sheet_name: str, rows: int, cols: int) -> int:
+        """Sheet id by title (create if doesn't exist); cached after the first lookup"""
+        if sheet_name not in self._sheet_ids:
+            response = await self.http.get(
+                self.api_url, params={"fields": "sheets.properties(sheetId,title)"},
+                headers=await self._auth_headers(),
+            )
+            response.raise_for_status()
+            for sheet in response.json().get("sheets", []):
+                props = sheet["properties"]
+                self._sheet_ids[props["title"]] = props["sheetId"]
+
+        if sheet_name not in self._sheet_ids:
+            reply = await self._batch_update([{"addSheet": {"properties": {
+                "title": sheet_name,
+                "gridProperties": {"rowCount": rows, "columnCount": cols},
+            }}}])
+            self._sheet_ids[sheet_name] = reply["replies"][0]["addSheet"]["properties"]["sheetId"]
+
+        return self._sheet_ids[sheet_name]
 
-                # Clear and update
-                worksheet.clear()
-                worksheet.update('A1', data)
+    async def _write_to_sheet(self, sheet_name: str, data: List[List]):
+        """
+        Replace a sheet's contents with `data` (create the sheet if needed).
+        Resize + clear + write + header format go out as ONE batchUpdate request.
+        """
+        try:
+            cols = max(26, len(data[0]) if data else 0)
+            sheet_id = await self._get_sheet_id(sheet_name, rows=len(data) + 100, cols=cols)
+
+            await self._batch_update([
+                {"updateSheetProperties": {
+                    "properties": {
+                        "sheetId": sheet_id,
+                        "gridProperties": {"rowCount": len(data) + 100, "columnCount": cols},
+                    },
+                    "fields": "gridProperties(rowCount,columnCount)",
+                }},
+                # Clear old values
+                {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}},
+                {"updateCells": {
+                    "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                    "rows": [{"values": [_cell(v) for v in row]} for row in data],
+                    "fields": "userEnteredValue",
+                }},
+                _header_format_request(sheet_id),
+            ])
 
-                # Format header row
-                worksheet.format('A1:Z1', {
-                    "backgroundColor": {"red": 0.2, "green": 0.5, "blue": 0.8},
-                    "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}}
-                })
+        except Exception as e:
+            logger.error("Error writing to sheet {}: {}", sheet_name, e)
+            raise
 
-                return True
+    async def _stream_to_sheet(
+        self, sheet_name: str, headers: List, chunks: AsyncIterator[List[List]]
+    ) -> int:
+        """
+        Replace a sheet's contents with `headers` + rows produced chunk by chunk.
+        Each chunk is appended (appendCells, grows the grid as needed) while the
+        next one is fetched, so only about one chunk is in memory at a time.
+        Returns the number of data rows written.
+        """
+        pending = None
+        try:
+            sheet_id = await self._get_sheet_id(sheet_name, rows=100, cols=max(26, len(headers)))
+            await self._batch_update([
+                {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}},
+                {"updateCells": {
+                    "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                    "rows": [{"values": [_cell(v) for v in headers]}],
+                    "fields": "userEnteredValue",
+                }},
+                _header_format_request(sheet_id),
+            ])
+
+            written = 0
+            async for rows in chunks:
+                if pending is not None:
+                    await pending
+                pending = asyncio.create_task(self._batch_update([{"appendCells": {
+                    "sheetId": sheet_id,
+                    "rows": [{"values": [_cell(v) for v in row]} for row in rows],
+                    "fields": "userEnteredValue",
+                }}]))
+                written += len(rows)
+            if pending is not None:
+                await pending
+
+            return written
 
-            except Exception as e:
-                logger.error(f"Error writing to sheet {sheet_name}: {e}")
-                raise
+        except Exception as e:
+            logger.error("Error writing to sheet {}: {}", sheet_name, e)
+            raise
 
-        # Run synchronous gspread code in executor
-        await loop.run_in_executor(None, _sync_write)
+        finally:
+            # If fetching the next chunk failed, an append may still be in
+            # flight: cancel it and collect its outcome (no orphaned task)
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
 
     async def sync_from_sheets(self) -> Dict:
         """
@@ -271,5 +426,14 @@ class GoogleSheetsIntegration:
         return {"success": False, "message": "Not implemented"}
 
 
-# Export singleton instance
-sheets_integration = GoogleSheetsIntegration()
+@lru_cache(maxsize=1)
+def get_sheets() -> GoogleSheetsIntegration:
+    """Shared instance, created on first use (not at import: no credentials needed to import)"""
+    return GoogleSheetsIntegration()
+
+
+async def close_sheets() -> None:
+    """Close the shared instance's HTTP client (no-op if it was never created)"""
+    if get_sheets.cache_info().currsize:
+        await get_sheets().http.aclose()
+        get_sheets.cache_clear()
@@ -3,12 +3,14 @@ Google Notebook LM Integration
 AI-powered analytics and insights using Google AI
 """
 
+import asyncio
+from functools import lru_cache
 from loguru import logger
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import google.generativeai as genai
 
 from config.config import settings
-from database.db import get_db
+from database.db import get_db_readonly
 from database.models import Sale, Product
 from sqlalchemy import select, func
 from datetime import datetime, timedelta
@@ -31,6 +33,24 @@ class NotebookLMIntegration:
             logger.warning("Google AI API key not configured")
             self.model = None
 
+        # Generated texts keyed by (kind, params..., hour); reset when the hour rolls over
+        self._cache: Dict[Tuple, str] = {}
+        self._cache_hour: Optional[datetime] = None
+
+    def _cached(self, key: Tuple) -> Tuple[Tuple, Optional[str]]:
+        """Return (full cache key, cached text or None) for the current hour"""
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        if hour != self._cache_hour:
+            self._cache.clear()
+            self._cache_hour = hour
+        key = key + (hour,)
+        return key, self._cache.get(key)
+
+    async def _generate(self, prompt: str) -> str:
+        """Gemini call on the SDK's async (grpc.aio) client, driven by the event loop"""
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
     async def generate_sales_insights(self, days: int = 30) -> Optional[str]:
         """
         Generate AI-powered insights about sales performance
@@ -38,8 +58,12 @@ class NotebookLMIntegration:
         if not self.model:
             return None
 
+        cache_key, cached = self._cached(("sales", days))
+        if cached is not None:
+            return cached
+
         try:
-            async with get_db() as db:
+            async with get_db_readonly() as db:
                 # Get sales data for the period
                 since_date = datetime.now() - timedelta(days=days)
 
@@ -52,7 +76,7 @@ class NotebookLMIntegration:
                     Sale.created_at >= since_date
                 ).group_by(Product.name).order_by(
                     func.sum(Sale.final_price_thb).desc()
-                )
+                ).limit(5)  # top-5 only; lets the planner use a top-N sort
 
                 result = await db.execute(stmt)
                 sales_data = result.all()
@@ -63,9 +87,10 @@ class NotebookLMIntegration:
                 # Prepare data summary for AI
                 data_summary = f"Анализ продаж за последние {days} дней:\n\n"
                 data_summary += "Топ-5 товаров по выручке:\n"
-
-                for i, row in enumerate(sales_data[:5], 1):
-                    data_summary += f"{i}. {row.name}: {row.total_revenue}฿ ({row.total_quantity} шт, {row.sales_count} продаж)\n"
+                data_summary += "".join(
+                    f"{i}. {row.name}: {row.total_revenue}฿ ({row.total_quantity} шт, {row.sales_count} продаж)\n"
+                    for i, row in enumerate(sales_data, 1)
+                )
 
                 # Generate insights using AI
                 prompt = f"""
@@ -80,8 +105,10 @@ class NotebookLMIntegration:
 3. Предложения по оптимизации ассортимента
 """
 
-                response = self.model.generate_content(prompt)
-                return response.text
+            # Connection goes back to the pool before the (slow) model call
+            text = await self._generate(prompt)
+            self._cache[cache_key] = text
+            return text
 
         except Exception as e:
             logger.error(f"Failed to generate insights: {e}")
@@ -94,14 +121,18 @@ class NotebookLMIntegration:
         if not self.model:
             return None
 
+        cache_key, cached = self._cached(("inventory",))
+        if cached is not None:
+            return cached
+
         try:
-            async with get_db() as db:
+            async with get_db_readonly() as db:
                 # Get low stock items
                 from database.models import InventoryProduct
 
                 stmt = select(Product, InventoryProduct).join(InventoryProduct).where(
                     InventoryProduct.quantity < InventoryProduct.min_stock_level
-                )
+                ).limit(10)
 
                 result = await db.execute(stmt)
                 low_stock = result.all()
@@ -110,8 +141,10 @@ class NotebookLMIntegration:
                     return "Все товары в достаточном количестве"
 
                 summary = "Товары с низкими остатками:\n"
-                for product, inv in low_stock[:10]:
-                    summary += f"- {product.name}: {inv.quantity}/{inv.min_stock_level} шт\n"
+                summary += "".join(
+                    f"- {product.name}: {inv.quantity}/{inv.min_stock_level} шт\n"
+                    for product, inv in low_stock
+                )
 
                 prompt = f"""
 Ты логист для шоколадной компании. Проанализируй ситуацию с остатками и дай рекомендации:
@@ -124,8 +157,9 @@ class NotebookLMIntegration:
 3. Стратегию предотвращения дефицита
 """
 
-                response = self.model.generate_content(prompt)
-                return response.text
+            text = await self._generate(prompt)
+            self._cache[cache_key] = text
+            return text
 
         except Exception as e:
             logger.error(f"Failed to analyze inventory: {e}")
@@ -138,8 +172,11 @@ class NotebookLMIntegration:
         if not self.model:
             return None
 
-        sales_insights = await self.generate_sales_insights(days=7)
-        inventory_insights = await self.analyze_inventory_optimization()
+        # Independent DB queries + model calls, run concurrently
+        sales_insights, inventory_insights = await asyncio.gather(
+            self.generate_sales_insights(days=7),
+            self.analyze_inventory_optimization(),
+        )
 
         summary = "📊 **БИЗНЕС-АНАЛИТИКА**\n\n"
 
@@ -154,5 +191,7 @@ class NotebookLMIntegration:
         return summary
 
 
-# Export singleton instance
-notebook_integration = NotebookLMIntegration()
+@lru_cache(maxsize=1)
+def get_notebook() -> NotebookLMIntegration:
+    """Shared instance, created on first use (not at import)"""
+    return NotebookLMIntegration()
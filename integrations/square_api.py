@@ -3,31 +3,281 @@ Square API Integration
 Sync inventory, sales, and products with Square POS
 """
 
-from square.client import Client
+import asyncio
+import random
+import time
+
+import httpx
 from loguru import logger
-from typing import Dict, List, Optional
-from datetime import datetime
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from contextlib import aclosing
+from functools import lru_cache
 
 from config.config import settings
-from database.db import get_db
+from database.db import get_db, bulk_insert
 from database.models import (
     Product, InventoryProduct, Sale, SquareSyncLog,
     SyncType, SyncStatus, SaleSource
 )
-from sqlalchemy import select
+from sqlalchemy import select, update, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Square REST API version pinned via the Square-Version header
+SQUARE_API_VERSION = "2024-10-17"
+# Max changes per batch-create inventory request
+SQUARE_BATCH_SIZE = 100
+# Concurrent API calls (Square allows ~10 req/s per merchant)
+SQUARE_MAX_CONCURRENCY = 8
+# Client-side request rate: sustained req/s and burst size
+SQUARE_RATE_PER_SEC = 8
+SQUARE_RATE_BURST = 10
+# Retries for throttled/unavailable responses: attempts and backoff base (s)
+SQUARE_MAX_ATTEMPTS = 5
+SQUARE_RETRY_BASE = 0.5
+SQUARE_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Circuit breaker: consecutive failed calls before opening, seconds until a probe
+SQUARE_BREAKER_THRESHOLD = 5
+SQUARE_BREAKER_RECOVERY = 30
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Square while a circuit breaker is open"""
+
+
+class SquareAPIError(Exception):
+    """A Square call failed; `errors` is Square's error list"""
+
+    def __init__(self, errors: List[Dict]):
+        super().__init__(str(errors))
+        self.errors = errors
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN after `failure_threshold` consecutive failures; after
+    `recovery_timeout` seconds one HALF_OPEN probe is let through, and its
+    outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected without trying"""
+        return (
+            self.state == self.HALF_OPEN
+            or (self.state == self.OPEN
+                and time.monotonic() - self._opened_at < self.recovery_timeout)
+        )
+
+    def before_call(self) -> None:
+        if self.is_open:
+            raise CircuitOpenError(f"circuit_open: Square {self.name} API unavailable")
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN  # this call is the probe
+
+    def on_success(self) -> None:
+        self.state = self.CLOSED
+        self._failures = 0
+
+    def on_cancel(self) -> None:
+        # A cancelled call proves nothing; if it was the probe, let the next
+        # call probe instead of leaving the circuit HALF_OPEN (= open) forever
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+    def on_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Square {} circuit opened", self.name)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: `rate` tokens/s refill up to `burst`.
+    Waiting here is cheaper than spending a round trip on a 429.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _errors(response: httpx.Response) -> List[Dict]:
+    """Square's error list from a failed response (or the raw status)"""
+    try:
+        return response.json().get("errors", [])
+    except ValueError:
+        return [{"code": str(response.status_code), "detail": response.text}]
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for in-flight requests: grows additively on
+    success, halves when Square throttles (429/5xx).
+    """
+
+    def __init__(self, initial: int, maximum: int, increase: float = 0.5):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.increase = increase
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + self.increase)
+
+    def on_throttle(self) -> None:
+        self.limit = max(1.0, self.limit / 2)
+
+
+def _retry_after(response: Optional[httpx.Response]) -> float:
+    """Seconds from a Retry-After header (0 if absent or an HTTP date)"""
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
 
 
 class SquareIntegration:
     """Handle all Square API operations"""
 
     def __init__(self):
-        """Initialize Square client"""
-        self.client = Client(
-            access_token=settings.square_access_token,
-            environment=settings.square_environment
-        )
+        """Initialize Square client (settings are read once, here)"""
+        self.environment = settings.square_environment
         self.location_id = settings.square_location_id
-        logger.info(f"Square API initialized (env: {settings.square_environment})")
+        host = (
+            "connect.squareupsandbox.com"
+            if self.environment == "sandbox"
+            else "connect.squareup.com"
+        )
+        # Native async REST calls over one pooled HTTP/2 connection (no SDK,
+        # no executor threads); concurrent requests are multiplexed
+        self.http = httpx.AsyncClient(
+            base_url=f"https://{host}",
+            headers={
+                "Authorization": f"Bearer {settings.square_access_token}",
+                "Square-Version": SQUARE_API_VERSION,
+            },
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=SQUARE_MAX_CONCURRENCY,
+                max_keepalive_connections=SQUARE_MAX_CONCURRENCY,
+            ),
+            timeout=httpx.Timeout(10.0, connect=3.0),
+        )
+        self._bucket = TokenBucket(SQUARE_RATE_PER_SEC, SQUARE_RATE_BURST)
+        # Bulkheads: each API area has its own breaker and concurrency limit,
+        # so an outage (or throttling) of one doesn't block or shrink the others
+        areas = ("inventory", "orders", "catalog")
+        self._breakers = {
+            name: CircuitBreaker(name, SQUARE_BREAKER_THRESHOLD, SQUARE_BREAKER_RECOVERY)
+            for name in areas
+        }
+        self._limiters = {
+            name: AdaptiveLimiter(SQUARE_MAX_CONCURRENCY, SQUARE_MAX_CONCURRENCY)
+            for name in areas
+        }
+        logger.info("Square API initialized (env: {})", self.environment)
+
+    async def _post(self, path: str, body: Dict) -> httpx.Response:
+        """
+        POST a JSON body to a Square REST endpoint (rate limited).
+        Throttled/unavailable responses and transport errors are retried with
+        exponential backoff + jitter, honoring Retry-After; every write carries
+        an idempotency key, so retries cannot double-apply.
+        Raises CircuitOpenError without a request while the endpoint's
+        breaker is open.
+        """
+        area = path.split("/")[2]
+        breaker = self._breakers[area]
+        breaker.before_call()
+        try:
+            response = await self._post_with_retries(path, body, self._limiters[area])
+        except asyncio.CancelledError:
+            breaker.on_cancel()
+            raise
+        except Exception:
+            breaker.on_failure()
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.on_failure()
+        else:
+            breaker.on_success()
+        return response
+
+    async def _post_with_retries(
+        self, path: str, body: Dict, limiter: AdaptiveLimiter
+    ) -> httpx.Response:
+        """_post's retry loop (see there)"""
+        for attempt in range(SQUARE_MAX_ATTEMPTS):
+            last_attempt = attempt == SQUARE_MAX_ATTEMPTS - 1
+            await self._bucket.acquire()
+
+            response = None
+            async with limiter:
+                try:
+                    response = await self.http.post(path, json=body)
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+
+            if response is not None and response.status_code not in SQUARE_RETRY_STATUSES:
+                limiter.on_success()
+                return response
+
+            limiter.on_throttle()
+            if last_attempt:
+                return response
+
+            delay = max(_retry_after(response), SQUARE_RETRY_BASE * 2 ** attempt)
+            delay += random.uniform(0, SQUARE_RETRY_BASE)
+            logger.warning(
+                "Square {} throttled/unavailable ({}), retrying in {:.1f}s",
+                path, response.status_code if response is not None else "network error", delay
+            )
+            await asyncio.sleep(delay)
 
     async def sync_inventory(self) -> Dict:
         """
@@ -36,6 +286,9 @@ class SquareIntegration:
         """
         logger.info("Starting inventory sync to Square...")
 
+        if self._breakers["inventory"].is_open:
+            return {"success": False, "error": "circuit_open"}
+
         async with get_db() as db:
             # Create sync log
             sync_log = SquareSyncLog(
@@ -43,47 +296,94 @@ class SquareIntegration:
                 sync_status=SyncStatus.IN_PROGRESS
             )
             db.add(sync_log)
+            await db.flush()
+            # Deterministic per run: chunk i is always sent as "<key>-<i>", so any
+            # retry of it is deduplicated by Square instead of double-applied
+            sync_log.idempotency_key = f"inv-batch-{sync_log.id}"
             await db.commit()
 
-            try:
-                # Get all products with inventory
-                stmt = select(Product, InventoryProduct).join(InventoryProduct).where(
-                    Product.is_active == True,
-                    Product.square_item_id.isnot(None)
-                )
-                result = await db.execute(stmt)
-                products = result.all()
+            log = logger.bind(sync_id=str(sync_log.id))
 
-                synced_count = 0
+            try:
+                # Failed batches are collected and reported once at the end
+                failures: List[tuple] = []
 
-                for product, inventory in products:
+                # Chunks are sent concurrently; _post bounds how many are in flight
+                async def send_chunk(index: int, chunk: List[Dict]) -> int:
                     try:
-                        # Update Square inventory
-                        result = self.client.inventory.batch_change_inventory(
-                            body={
-                                "idempotency_key": f"inv-{product.id}-{datetime.now().timestamp()}",
-                                "changes": [
-                                    {
-                                        "type": "PHYSICAL_COUNT",
-                                        "physical_count": {
-                                            "catalog_object_id": product.square_item_id,
-                                            "location_id": self.location_id,
-                                            "quantity": str(inventory.quantity),
-                                            "occurred_at": datetime.utcnow().isoformat()
-                                        }
-                                    }
-                                ]
+                        response = await self._post(
+                            "/v2/inventory/changes/batch-create",
+                            {
+                                "idempotency_key": f"{sync_log.idempotency_key}-{index}",
+                                "changes": chunk
                             }
                         )
-
-                        if result.is_success():
-                            synced_count += 1
-                            logger.debug(f"Synced inventory for {product.sku}")
-                        else:
-                            logger.error(f"Failed to sync {product.sku}: {result.errors}")
-
                     except Exception as e:
-                        logger.error(f"Error syncing {product.sku}: {e}")
+                        failures.append((index, str(e)))
+                        return 0
+
+                    # A batch is applied atomically: all changes or none
+                    if response.is_success:
+                        log.debug("Synced inventory batch {} ({} products)", index, len(chunk))
+                        return len(chunk)
+                    failures.append((index, response))
+                    return 0
+
+                # Only the columns the changes need, streamed: each partition of
+                # SQUARE_BATCH_SIZE rows (the endpoint's per-request maximum) is
+                # dispatched while the next one is still being read
+                stmt = (
+                    select(Product.square_item_id, InventoryProduct.quantity)
+                    .join(InventoryProduct)
+                    .where(
+                        Product.is_active == True,
+                        Product.square_item_id.isnot(None)
+                    )
+                    .execution_options(yield_per=500)
+                )
+                result = await db.stream(stmt)
+
+                # One RFC 3339 timestamp for the whole sync ("as of now"), formatted once
+                occurred_at = datetime.now(timezone.utc).isoformat()
+                tasks = []
+                total = 0
+
+                try:
+                    async for partition in result.partitions(SQUARE_BATCH_SIZE):
+                        chunk = [
+                            {
+                                "type": "PHYSICAL_COUNT",
+                                "physical_count": {
+                                    "catalog_object_id": square_item_id,
+                                    "location_id": self.location_id,
+                                    "quantity": str(quantity),
+                                    "occurred_at": occurred_at
+                                }
+                            }
+                            for square_item_id, quantity in partition
+                        ]
+                        tasks.append(asyncio.create_task(send_chunk(len(tasks), chunk)))
+                        total += len(chunk)
+
+                    synced_count = sum(await asyncio.gather(*tasks))
+                finally:
+                    # If reading rows fails partway, batches already started must
+                    # not keep posting after the sync is logged as FAILED
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+                if failures:
+                    # Square error bodies are only decoded if the message is emitted
+                    log.opt(lazy=True).error(
+                        "{} of {} inventory batches failed: {}",
+                        lambda: len(failures),
+                        lambda: len(tasks),
+                        lambda: [
+                            (i, f if isinstance(f, str) else _errors(f))
+                            for i, f in failures
+                        ],
+                    )
 
                 # Update sync log
                 sync_log.sync_status = SyncStatus.SUCCESS
@@ -91,12 +391,12 @@ class SquareIntegration:
                 sync_log.records_synced = synced_count
                 await db.commit()
 
-                logger.success(f"Inventory sync completed. Synced {synced_count} products.")
+                log.success("Inventory sync completed. Synced {} products.", synced_count)
 
                 return {
                     "success": True,
                     "synced": synced_count,
-                    "total": len(products)
+                    "total": total
                 }
 
             except Exception as e:
@@ -106,114 +406,181 @@ class SquareIntegration:
                 sync_log.completed_at = datetime.now()
                 await db.commit()
 
-                logger.error(f"Inventory sync failed: {e}")
+                log.error("Inventory sync failed: {}", e)
                 return {
                     "success": False,
                     "error": str(e)
                 }
 
+    async def _iter_orders(self, query: Dict) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of orders matching `query`, following Square's cursor.
+        The next page is fetched in the background while the caller
+        processes the current one.
+        """
+        async def fetch(cursor: Optional[str]) -> Dict:
+            body = {"location_ids": [self.location_id], "query": query}
+            if cursor:
+                body["cursor"] = cursor
+            response = await self._post("/v2/orders/search", body)
+            if not response.is_success:
+                raise SquareAPIError(_errors(response))
+            return response.json()
+
+        pending = asyncio.create_task(fetch(None))
+        try:
+            while pending is not None:
+                page = await pending
+                cursor = page.get("cursor")
+                pending = asyncio.create_task(fetch(cursor)) if cursor else None
+                yield page.get("orders", [])
+        finally:
+            # Cancel the prefetch and collect its outcome, so the request
+            # doesn't outlive the caller (or log an unretrieved exception)
+            if pending is not None:
+                pending.cancel()
+                await asyncio.gather(pending, return_exceptions=True)
+
     async def sync_sales_from_square(self) -> Dict:
         """
         Import sales from Square POS to database
-        Fetches recent transactions and creates Sale records
+        Fetches recent transactions page by page and creates Sale records
         """
         logger.info("Importing sales from Square...")
 
-        try:
-            # Get orders from Square
-            result = self.client.orders.search_orders(
-                body={
-                    "location_ids": [self.location_id],
-                    "query": {
-                        "filter": {
-                            "state_filter": {
-                                "states": ["COMPLETED"]
-                            },
-                            "date_time_filter": {
-                                "created_at": {
-                                    "start_at": (datetime.now() - timedelta(days=7)).isoformat()
-                                }
-                            }
-                        }
+        if self._breakers["orders"].is_open:
+            return {"success": False, "error": "circuit_open"}
+
+        query = {
+            "filter": {
+                "state_filter": {
+                    "states": ["COMPLETED"]
+                },
+                "date_time_filter": {
+                    "created_at": {
+                        "start_at": (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
                     }
                 }
-            )
-
-            if not result.is_success():
-                logger.error(f"Failed to fetch orders: {result.errors}")
-                return {"success": False, "error": result.errors}
+            }
+        }
 
-            orders = result.body.get("orders", [])
+        try:
             imported_count = 0
 
             async with get_db() as db:
-                for order in orders:
-                    try:
-                        # Process each line item
-                        for line_item in order.get("line_items", []):
-                            catalog_id = line_item.get("catalog_object_id")
-
-                            # Find product by Square ID
-                            stmt = select(Product).where(Product.square_item_id == catalog_id)
-                            result = await db.execute(stmt)
-                            product = result.scalar_one_or_none()
-
-                            if not product:
-                                logger.warning(f"Product not found for catalog ID {catalog_id}")
-                                continue
-
-                            # Check if sale already imported
-                            stmt_check = select(Sale).where(
-                                Sale.square_transaction_id == order.get("id")
-                            )
-                            existing = await db.execute(stmt_check)
-                            if existing.scalar_one_or_none():
-                                continue  # Already imported
-
-                            # Create sale record
-                            quantity = int(line_item.get("quantity", 1))
-                            total_money = line_item.get("total_money", {})
-                            amount = float(total_money.get("amount", 0)) / 100  # Convert from cents
-
-                            sale = Sale(
-                                product_id=product.id,
-                                quantity=quantity,
-                                unit_price_thb=amount / quantity if quantity > 0 else 0,
-                                final_price_thb=amount,
-                                source=SaleSource.SQUARE_POS,
-                                square_transaction_id=order.get("id")
-                            )
-                            db.add(sale)
-
-                            # Update inventory
-                            stmt_inv = select(InventoryProduct).where(
-                                InventoryProduct.product_id == product.id
-                            )
-                            inv_result = await db.execute(stmt_inv)
-                            inventory = inv_result.scalar_one_or_none()
-
-                            if inventory:
-                                inventory.quantity = max(0, inventory.quantity - quantity)
-
-                            imported_count += 1
-
-                await db.commit()
-
-            logger.success(f"Imported {imported_count} sales from Square")
+                # One commit per page keeps memory bounded
+                # aclosing: the generator's cleanup runs as soon as the loop
+                # exits, including when _import_orders raises
+                async with aclosing(self._iter_orders(query)) as pages:
+                    async for orders in pages:
+                        imported_count += await self._import_orders(db, orders)
+                        await db.commit()
+
+            logger.success("Imported {} sales from Square", imported_count)
             return {"success": True, "imported": imported_count}
 
+        except SquareAPIError as e:
+            logger.error("Failed to fetch orders: {}", e.errors)
+            return {"success": False, "error": e.errors}
+
         except Exception as e:
-            logger.error(f"Failed to import sales: {e}")
+            logger.error("Failed to import sales: {}", e)
             return {"success": False, "error": str(e)}
 
+    async def _import_orders(self, db: AsyncSession, orders: List[Dict]) -> int:
+        """Insert Sale rows for one page of orders; returns sales created"""
+        # Preload referenced products and already-imported orders (two
+        # queries instead of two per line item)
+        catalog_ids = {
+            li.get("catalog_object_id")
+            for order in orders
+            for li in order.get("line_items", [])
+        }
+        order_ids = {order.get("id") for order in orders}
+
+        result = await db.execute(
+            select(Product.square_item_id, Product.id).where(
+                Product.square_item_id.in_(catalog_ids)
+            )
+        )
+        product_ids_by_sq = dict(result.all())
+
+        result = await db.execute(
+            select(Sale.square_transaction_id).where(
+                Sale.square_transaction_id.in_(order_ids)
+            )
+        )
+        already_imported = set(result.scalars())
+
+        sales_rows: List[Dict] = []
+        decrements: Dict = defaultdict(int)  # product_id -> units sold
+        unknown_catalog_ids = set()
+
+        for order in orders:
+            if order.get("id") in already_imported:
+                continue
+
+            try:
+                # Process each line item
+                for line_item in order.get("line_items", []):
+                    catalog_id = line_item.get("catalog_object_id")
+
+                    product_id = product_ids_by_sq.get(catalog_id)
+                    if not product_id:
+                        unknown_catalog_ids.add(catalog_id)
+                        continue
+
+                    # Sale row (Square money is already in minor units, i.e. satang)
+                    quantity = int(line_item.get("quantity", 1))
+                    total_money = line_item.get("total_money", {})
+                    amount = int(total_money.get("amount", 0))
+
+                    sales_rows.append({
+                        "product_id": product_id,
+                        "quantity": quantity,
+                        "unit_price_satang": round(amount / quantity) if quantity > 0 else 0,
+                        "discount_satang": 0,
+                        "final_price_satang": amount,
+                        "source": SaleSource.SQUARE_POS,
+                        "square_transaction_id": order.get("id")
+                    })
+                    decrements[product_id] += quantity
+
+            except Exception as e:
+                logger.error("Error importing order {}: {}", order.get("id"), e)
+
+        if unknown_catalog_ids:
+            logger.warning("Products not found for catalog IDs: {}", unknown_catalog_ids)
+
+        # One executemany INSERT for the page instead of an ORM add per sale
+        await bulk_insert(db, Sale, sales_rows)
+
+        # One UPDATE ... CASE for every product's stock, clamped at 0 in SQL
+        if decrements:
+            await db.execute(
+                update(InventoryProduct)
+                .where(InventoryProduct.product_id.in_(list(decrements)))
+                .values(quantity=func.greatest(
+                    InventoryProduct.quantity
+                    - case(decrements, value=InventoryProduct.product_id),
+                    0
+                ))
+                .execution_options(synchronize_session=False)
+            )
+
+        return len(sales_rows)
+
     async def create_square_item(self, product: Product) -> Optional[str]:
         """
         Create a new item in Square catalog for a product
         Returns the Square catalog object ID if successful
         """
         try:
-            result = self.client.catalog.upsert_catalog_object(
-                body={
+            response = await self._post(
+                "/v2/catalog/object",
+                {
+                    # One key per product for all time: creating the same item
+                    # twice returns the existing object instead of a duplicate
                     "idempotency_key": f"item-{product.id}",
                     "object": {
                         "type": "ITEM",
@@ -230,7 +597,7 @@ class SquareIntegration:
                                         "name": "Regular",
                                         "pricing_type": "FIXED_PRICING",
                                         "price_money": {
-                                            "amount": int(product.retail_price_thb * 100),
+                                            "amount": product.retail_price_satang,
                                             "currency": "THB"
                                         },
                                         "sku": product.sku
@@ -242,19 +609,37 @@ class SquareIntegration:
                 }
             )
 
-            if result.is_success():
-                catalog_object = result.body["catalog_object"]
+            if response.is_success:
+                catalog_object = response.json()["catalog_object"]
                 square_id = catalog_object["id"]
-                logger.info(f"Created Square item for {product.sku}: {square_id}")
+                logger.info("Created Square item for {}: {}", product.sku, square_id)
                 return square_id
             else:
-                logger.error(f"Failed to create Square item: {result.errors}")
+                logger.error("Failed to create Square item: {}", _errors(response))
                 return None
 
         except Exception as e:
-            logger.error(f"Error creating Square item: {e}")
+            logger.error("Error creating Square item: {}", e)
             return None
 
+    async def create_square_items_bulk(self, products: List[Product]) -> Dict:
+        """
+        Create Square catalog items for many products concurrently
+        (rate limiting and the in-flight bound are applied by _post).
+        Returns {product.id: Square catalog object ID or None}
+        """
+        square_ids = await asyncio.gather(*(self.create_square_item(p) for p in products))
+        return {product.id: square_id for product, square_id in zip(products, square_ids)}
+
+
+@lru_cache(maxsize=1)
+def get_square() -> SquareIntegration:
+    """Shared instance, created on first use (not at import)"""
+    return SquareIntegration()
+
 
-# Export singleton instance
-square_integration = SquareIntegration()
+async def close_square() -> None:
+    """Close the shared instance's HTTP client (no-op if it was never created)"""
+    if get_square.cache_info().currsize:
+        await get_square().http.aclose()
+        get_square.cache_clear()
@@ -1,15 +1,23 @@
 """
 Seed database with initial data for Chocodealers Bot
-Full product and ingredient catalog from seed_data.sql
+Full product and ingredient catalog (scripts/seed/*.csv, from seed_data.sql)
 """
 
+import argparse
 import asyncio
+import csv
 import sys
+from decimal import Decimal
 from pathlib import Path
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from loguru import logger
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from config.config import settings
 from database.db import AsyncSessionLocal
 from database.models import (
     User, UserRole, UserStatus,
@@ -17,426 +25,269 @@ from database.models import (
     Ingredient, IngredientCategory, IngredientUnit,
     InventoryProduct, InventoryIngredient
 )
-from sqlalchemy import select
+from sqlalchemy import select, insert, literal
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
-async def seed_database():
-    """Add initial data to database"""
-    async with AsyncSessionLocal() as session:
-        try:
-            print("🌱 Starting database seeding...")
-
-            # Check if data already exists
-            result = await session.execute(select(User))
-            if result.scalars().first():
-                print("⚠️  Database already has data. Skipping seeding.")
-                return
-
-            # ====================================
-            # 1. CREATE ADMIN USERS
-            # ====================================
-            admin_sah = User(
-                telegram_id=7699749902,
-                username="Sah",
-                first_name="Sah",
-                role=UserRole.ADMIN,
-                status=UserStatus.ACTIVE,
-                is_admin=True
+SEED_DIR = Path(__file__).parent / "seed"
+
+# (telegram_id, username, first_name)
+ADMIN_USERS = (
+    (7699749902, "Sah", "Sah"),
+    (47361914, "kseniia_kisa", "Ksenia"),
+)
+
+
+def satang(thb: str) -> int:
+    """THB amount as integer satang (the stored money unit)"""
+    return int((Decimal(thb) * 100).to_integral_value())
+
+
+def _read_csv(name: str) -> List[Dict[str, str]]:
+    with open(SEED_DIR / name, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@lru_cache(maxsize=None)
+def load_ingredients() -> Tuple[dict, ...]:
+    """
+    Ingredient rows (insert-ready dicts) from ingredients.csv.
+    Plain data, no ORM objects or session needed: importable by fixtures;
+    parsed once per process.
+    """
+    return tuple(
+        {
+            "code": row["code"],
+            "name": row["name"],
+            "category": IngredientCategory[row["category"]],
+            "unit": IngredientUnit[row["unit"]],
+            "price_per_unit_satang": satang(row["price_per_unit_thb"]),
+            "supplier": row["supplier"],
+            "notes": row["notes"],
+            # Explicit, not the column's Python-side default: --emit-sql
+            # (literal_binds) doesn't evaluate those
+            "is_active": True,
+        }
+        for row in _read_csv("ingredients.csv")
+    )
+
+
+@lru_cache(maxsize=None)
+def load_products() -> Tuple[dict, ...]:
+    """Product rows (insert-ready dicts) from products.csv, parsed once"""
+    return tuple(
+        {
+            "sku": row["sku"],
+            "name": row["name"],
+            "category": ProductCategory[row["category"]],
+            "weight_g": Decimal(row["weight_g"]),
+            "cocoa_percent": row["cocoa_percent"],
+            "retail_price_satang": satang(row["retail_price_thb"]),
+            "cogs_satang": satang(row["cogs_thb"]),
+            "notes": row["notes"],
+            "grammovka": int(row["grammovka"]),
+            "unit_type": row["unit_type"],
+            "is_active": row["is_active"] == "True",
+        }
+        for row in _read_csv("products.csv")
+    )
+
+
+def admins_insert():
+    """Admin upsert statement (existing telegram_ids skipped)"""
+    return (
+        pg_insert(User)
+        .values([
+            {
+                "telegram_id": telegram_id,
+                "username": username,
+                "first_name": first_name,
+                "role": UserRole.ADMIN,
+                "status": UserStatus.ACTIVE,
+                "is_admin": True,
+            }
+            for telegram_id, username, first_name in ADMIN_USERS
+        ])
+        .on_conflict_do_nothing(index_elements=[User.telegram_id])
+        .returning(User.id)
+    )
+
+
+def ingredients_insert():
+    """Ingredient catalog + empty inventory as one statement"""
+    # The catalog INSERT (existing codes skipped) runs as a CTE whose
+    # RETURNING ids feed the inventory INSERT ... SELECT, so no round trip
+    # is spent fetching ids back to Python
+    new_ingredients = (
+        pg_insert(Ingredient)
+        .values(list(load_ingredients()))
+        .on_conflict_do_nothing(index_elements=[Ingredient.code])
+        .returning(Ingredient.id)
+        .cte("new_ingredients")
+    )
+    return (
+        insert(InventoryIngredient)
+        .from_select(
+            ["ingredient_id", "quantity_kg", "min_stock_level_kg",
+             "max_stock_level_kg", "location"],
+            select(
+                new_ingredients.c.id,
+                literal(Decimal("0")),
+                literal(Decimal("1")),
+                literal(Decimal("50")),
+                literal("Main Warehouse"),
             )
-            session.add(admin_sah)
-
-            admin_ksenia = User(
-                telegram_id=47361914,
-                username="kseniia_kisa",
-                first_name="Ksenia",
-                role=UserRole.ADMIN,
-                status=UserStatus.ACTIVE,
-                is_admin=True
+        )
+        .returning(InventoryIngredient.id)
+    )
+
+
+def products_insert():
+    """Product catalog + empty inventory as one statement"""
+    new_products = (
+        pg_insert(Product)
+        .values(list(load_products()))
+        .on_conflict_do_nothing(index_elements=[Product.sku])
+        .returning(Product.id)
+        .cte("new_products")
+    )
+    return (
+        insert(InventoryProduct)
+        .from_select(
+            ["product_id", "quantity", "min_stock_level", "max_stock_level", "location"],
+            select(
+                new_products.c.id,
+                literal(0),
+                literal(10),
+                literal(100),
+                literal("Main Warehouse"),
             )
-            session.add(admin_ksenia)
-            print("✅ Created admin users: Sah & Ksenia")
-
-            await session.flush()
-
-            # ====================================
-            # 2. CREATE INGREDIENTS (from seed_data.sql)
-            # ====================================
-            ingredients = [
-                # === Cacao & Base ===
-                Ingredient(
-                    code='ING-001', name='Cocoa Butter', category=IngredientCategory.CACAO_BASE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=900, supplier='Mark Rin', notes='Base fat'
-                ),
-                Ingredient(
-                    code='ING-002', name='Cocoa Powder', category=IngredientCategory.CACAO_BASE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=550, supplier='Mark Rin', notes='Base dry'
-                ),
-                Ingredient(
-                    code='ING-003', name='Coconut Sugar (Granulated)', category=IngredientCategory.CACAO_BASE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=110, supplier='Wholesale', notes='Main sweetener'
-                ),
-                Ingredient(
-                    code='ING-004', name='Monk Fruit Mix (Erythritol)', category=IngredientCategory.CACAO_BASE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=550, supplier='Specialty', notes='For Keto/No Sugar'
-                ),
-                Ingredient(
-                    code='ING-005', name='MCT Oil', category=IngredientCategory.CACAO_BASE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=660, supplier='Specialty', notes='For Bulletproof/Keto'
-                ),
-                Ingredient(
-                    code='ING-006', name='Coconut Meat (Nam Hom)', category=IngredientCategory.CACAO_BASE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=159, supplier='Makro/Local', notes='Frozen Flesh (Escimo)'
-                ),
-
-                # === Nuts & Seeds ===
-                Ingredient(
-                    code='ING-010', name='Cashew Nut (Broken)', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=225, supplier='Makro/Aro/Heritage', notes='For Milk Base & Truffles'
-                ),
-                Ingredient(
-                    code='ING-011', name='Almond (Sliced/Petal)', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=225, supplier='Makro/Aro/Heritage', notes='For Marzipan (No skin)'
-                ),
-                Ingredient(
-                    code='ING-012', name='Pecan Nut (Heritage)', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=840, supplier='Heritage', notes='Premium (420฿/500g)'
-                ),
-                Ingredient(
-                    code='ING-013', name='Pistachio (Shelled)', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=1320, supplier='Heritage', notes='Premium (330฿/250g)'
-                ),
-                Ingredient(
-                    code='ING-014', name='Macadamia (Local)', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=900, supplier='Local Thai', notes='Thai Local'
-                ),
-                Ingredient(
-                    code='ING-015', name='Hazelnut', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=600, supplier='Heritage', notes='Dynamic price'
-                ),
-                Ingredient(
-                    code='ING-016', name='Walnut', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=550, supplier='Aro', notes='Aro Vacuum'
-                ),
-                Ingredient(
-                    code='ING-017', name='Pumpkin Seeds', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=310, supplier='Wholesale', notes='155฿/500g'
-                ),
-                Ingredient(
-                    code='ING-018', name='Sesame White', category=IngredientCategory.NUTS_SEEDS,
-                    unit=IngredientUnit.kg, price_per_unit_thb=120, supplier='Wholesale', notes='For Halva/Symphony'
-                ),
-
-                # === Dairy Alternatives & Liquids ===
-                Ingredient(
-                    code='ING-020', name='Almond Milk (137 Degrees)', category=IngredientCategory.DAIRY_ALT,
-                    unit=IngredientUnit.L, price_per_unit_thb=130, supplier='137 Degrees', notes='For Coffee/Bar'
-                ),
-                Ingredient(
-                    code='ING-021', name='Cashew Cream Base (Homemade)', category=IngredientCategory.DAIRY_ALT,
-                    unit=IngredientUnit.kg, price_per_unit_thb=73, supplier='Homemade',
-                    notes='Calc: 120g Cashew + 100g Sugar + 300g Water'
-                ),
-                Ingredient(
-                    code='ING-022', name='Coconut Water (Namhom)', category=IngredientCategory.DAIRY_ALT,
-                    unit=IngredientUnit.L, price_per_unit_thb=40, supplier='Local', notes='Est. price for juice'
-                ),
-
-                # === Spices ===
-                Ingredient(
-                    code='ING-023', name='Vanilla Extract (Imition)', category=IngredientCategory.SPICES,
-                    unit=IngredientUnit.btl, price_per_unit_thb=100, supplier='Wholesale', notes='~100ml Bottle'
-                ),
-
-                # === Coffee Beans ===
-                Ingredient(
-                    code='ING-030', name='Ben Coffee (Medium)', category=IngredientCategory.COFFEE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=460, supplier='China Import', notes='China Import'
-                ),
-                Ingredient(
-                    code='ING-031', name='Brazil Roast', category=IngredientCategory.COFFEE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=800, supplier='Chiang Mai', notes='Chiang Mai'
-                ),
-                Ingredient(
-                    code='ING-032', name='Ethiopia / Thai Premium', category=IngredientCategory.COFFEE,
-                    unit=IngredientUnit.kg, price_per_unit_thb=1500, supplier='Specialty', notes='Specialty / Bulletproof'
-                ),
-
-                # === Chinese Tea ===
-                Ingredient(
-                    code='ING-040', name='Pu-erh (Old Stock)', category=IngredientCategory.TEA,
-                    unit=IngredientUnit.kg, price_per_unit_thb=1000, supplier='Direct Sourcing', notes='Price will increase'
-                ),
-                Ingredient(
-                    code='ING-041', name='White Tea', category=IngredientCategory.TEA,
-                    unit=IngredientUnit.kg, price_per_unit_thb=2000, supplier='Direct Sourcing', notes=''
-                ),
-                Ingredient(
-                    code='ING-042', name='Da Hong Pao', category=IngredientCategory.TEA,
-                    unit=IngredientUnit.kg, price_per_unit_thb=2000, supplier='Direct Sourcing', notes=''
-                ),
-                Ingredient(
-                    code='ING-043', name='Gaba Tea (Avg)', category=IngredientCategory.TEA,
-                    unit=IngredientUnit.kg, price_per_unit_thb=6000, supplier='Direct Sourcing', notes='Range 4000-8000฿'
-                ),
-
-                # === Packaging ===
-                Ingredient(
-                    code='PKG-001', name='Wrapper Small (31g)', category=IngredientCategory.PACKAGING,
-                    unit=IngredientUnit.pc, price_per_unit_thb=5.5, supplier='Supplier', notes=''
-                ),
-                Ingredient(
-                    code='PKG-002', name='Wrapper Large (75g)', category=IngredientCategory.PACKAGING,
-                    unit=IngredientUnit.pc, price_per_unit_thb=12.5, supplier='Supplier', notes=''
-                ),
-                Ingredient(
-                    code='PKG-003', name='Popsicle Stick', category=IngredientCategory.PACKAGING,
-                    unit=IngredientUnit.pc, price_per_unit_thb=0.5, supplier='Supplier', notes='Est.'
-                ),
-            ]
-
-            for ing in ingredients:
-                session.add(ing)
-            print(f"✅ Created {len(ingredients)} ingredients")
-
-            await session.flush()
-
-            # ====================================
-            # 3. CREATE PRODUCTS (from seed_data.sql)
-            # All products are OUR_CHOCOLATE category
-            # ====================================
-            products = [
-                # === Ice Cream ===
-                Product(
-                    sku='ICE-001', name='Eskimo Coconut (Vegan)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=85, cocoa_percent='0%', retail_price_thb=160, cogs_thb=20.50,
-                    notes='Кокос мякоть 159 THB/kg. Ваниль учтена.',
-                    grammovka=85, unit_type='штука', is_active=True
-                ),
-
-                # === Truffles (20-25g) ===
-                Product(
-                    sku='TRF-001', name='Classic Truffle Ball', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=20, cocoa_percent='75%', retail_price_thb=80, cogs_thb=10.20,
-                    notes='Кешью дробленый (225 THB)',
-                    grammovka=20, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='TRF-002', name='Pistachio Kiss', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=20, cocoa_percent='80%', retail_price_thb=200, cogs_thb=26.10,
-                    notes='Фисташка дорогая но цена продажи перекрывает',
-                    grammovka=20, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='TRF-003', name='Truffle Pecan Cream', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=20, cocoa_percent='75%', retail_price_thb=160, cogs_thb=16.50,
-                    notes='Пекан Heritage (840 THB/kg)',
-                    grammovka=20, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='TRF-004', name='Truffle Erotic/Coconut', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=20, cocoa_percent='75%', retail_price_thb=170, cogs_thb=14.00,
-                    notes='Кокос/Карамель - выгодные начинки',
-                    grammovka=20, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='TRF-005', name='Macadamia Flower', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=25, cocoa_percent='80%', retail_price_thb=220, cogs_thb=28.50,
-                    notes='Сложная сборка: Макадамия+Фисташка+Матча',
-                    grammovka=25, unit_type='штука', is_active=True
-                ),
-
-                # === Bars Small (31g) ===
-                Product(
-                    sku='BAR-S-01', name='Classic Bar 31g (Milky/Dark)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=31, cocoa_percent='65-100%', retail_price_thb=160, cogs_thb=26.20,
-                    notes='Цена Shop (минимум)',
-                    grammovka=31, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='BAR-S-02', name='Flavor Bar 31g (Mint/Orange/Love)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=31, cocoa_percent='75%', retail_price_thb=200, cogs_thb=27.00,
-                    notes='Высокая маржа (масла дешевые на порцию)',
-                    grammovka=31, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='BAR-S-03', name='Keto/No Sugar Bar 31g', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=31, cocoa_percent='90%', retail_price_thb=220, cogs_thb=29.45,
-                    notes='Премиум (Monk fruit)',
-                    grammovka=31, unit_type='штука', is_active=True
-                ),
-
-                # === Bars Large (75g) ===
-                Product(
-                    sku='BAR-L-01', name='Classic Bar 75g (Milky/Dark)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=75, cocoa_percent='65-100%', retail_price_thb=280, cogs_thb=62.58,
-                    notes='Базовая позиция',
-                    grammovka=75, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='BAR-L-02', name='Flavor Bar 75g (Mint/Orange/Love)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=75, cocoa_percent='75%', retail_price_thb=320, cogs_thb=64.00,
-                    notes='Лидер по прибыли в батах',
-                    grammovka=75, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='BAR-L-03', name='Keto/No Sugar Bar 75g', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=75, cocoa_percent='90%', retail_price_thb=340, cogs_thb=70.44,
-                    notes='Премиум (Monk fruit)',
-                    grammovka=75, unit_type='штука', is_active=True
-                ),
-
-                # === Bean-to-Bar ===
-                Product(
-                    sku='BAR-BTB-01', name='Bean-to-Bar Origin 30g', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=30, cocoa_percent='90%', retail_price_thb=260, cogs_thb=28.67,
-                    notes='Самая высокая ценность бренда',
-                    grammovka=30, unit_type='штука', is_active=True
-                ),
-
-                # === Symphony ===
-                Product(
-                    sku='SYM-001', name='Symphony Classic (Fruits & Seeds)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=50, cocoa_percent='90%', retail_price_thb=250, cogs_thb=36.50,
-                    notes='Весовой товар (цена за 50г)',
-                    grammovka=50, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='SYM-002', name='Symphony Elite FRUIT (No Sugar)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=40, cocoa_percent='100%', retail_price_thb=300, cogs_thb=38.00,
-                    notes='Только 5 фруктов + 100% шоколад',
-                    grammovka=40, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='SYM-003', name='Symphony Elite NUTS (No Sugar)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=40, cocoa_percent='100%', retail_price_thb=300, cogs_thb=42.50,
-                    notes='Дорогие орехи (Пекан/Фисташка/Макадамия)',
-                    grammovka=40, unit_type='штука', is_active=True
-                ),
-
-                # === Desserts ===
-                Product(
-                    sku='DES-001', name='Dessert (Banana)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=60, cocoa_percent='100%', retail_price_thb=160, cogs_thb=24.10,
-                    notes='Банан + Крем + Шоколад',
-                    grammovka=60, unit_type='штука', is_active=True
-                ),
-
-                # === Halva ===
-                Product(
-                    sku='HAL-001', name='Halva Pecan', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=25, cocoa_percent='80%', retail_price_thb=130, cogs_thb=17.80,
-                    notes='Самая дорогая халва по сырью',
-                    grammovka=25, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='HAL-002', name='Halva Hazelnut/Walnut', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=25, cocoa_percent='80%', retail_price_thb=130, cogs_thb=14.20,
-                    notes='Фундук/Грецкий (~550 THB)',
-                    grammovka=25, unit_type='штука', is_active=True
-                ),
-
-                # === Bonbons ===
-                Product(
-                    sku='BON-001', name='Marzipan Ball', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=20, cocoa_percent='80%', retail_price_thb=100, cogs_thb=10.80,
-                    notes='Миндаль лепестки (225 THB)',
-                    grammovka=20, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='BON-002', name='Chocolate Bonbons (Molded)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=12, cocoa_percent='75%', retail_price_thb=50, cogs_thb=6.50,
-                    notes='Корпусная конфета',
-                    grammovka=12, unit_type='штука', is_active=True
-                ),
-
-                # === Other ===
-                Product(
-                    sku='OTH-001', name='Tropical Fruit Mix Roll', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=50, cocoa_percent='100%', retail_price_thb=250, cogs_thb=32.00,
-                    notes='Сушеные фрукты в шоколаде',
-                    grammovka=50, unit_type='штука', is_active=True
-                ),
-                Product(
-                    sku='OTH-002', name='Fruits in 100% Chocolate', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=50, cocoa_percent='100%', retail_price_thb=200, cogs_thb=28.00,
-                    notes='Манго/Ананас/Банан (весовое)',
-                    grammovka=50, unit_type='штука', is_active=True
-                ),
-
-                # === Sets ===
-                Product(
-                    sku='SET-001', name='Halva Set (3 pcs)', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=75, cocoa_percent='80%', retail_price_thb=390, cogs_thb=46.20,
-                    notes='Набор из 3 видов',
-                    grammovka=75, unit_type='набор', is_active=True
-                ),
-                Product(
-                    sku='SET-002', name='Sample Box', category=ProductCategory.OUR_CHOCOLATE,
-                    weight_g=120, cocoa_percent='Mix', retail_price_thb=350, cogs_thb=65.00,
-                    notes='Промо-набор (Symphony+Marzipan+Truffle+Bars)',
-                    grammovka=120, unit_type='набор', is_active=True
-                ),
-            ]
-
-            for prod in products:
-                session.add(prod)
-            print(f"✅ Created {len(products)} products")
-
-            await session.flush()
-
-            # ====================================
-            # 4. CREATE INITIAL INVENTORY (EMPTY)
-            # ====================================
-            for product in products:
-                inventory_product = InventoryProduct(
-                    product_id=product.id,
-                    quantity=0,
-                    min_stock_level=10,
-                    max_stock_level=100,
-                    location="Main Warehouse"
-                )
-                session.add(inventory_product)
-
-            for ingredient in ingredients:
-                inventory_ingredient = InventoryIngredient(
-                    ingredient_id=ingredient.id,
-                    quantity_kg=0.0,
-                    min_stock_level_kg=1.0,
-                    max_stock_level_kg=50.0,
-                    location="Main Warehouse"
-                )
-                session.add(inventory_ingredient)
-
-            print("✅ Created empty inventory records")
-
-            # Commit all changes
-            await session.commit()
-            print("\n" + "=" * 60)
-            print("🎉 DATABASE SEEDING COMPLETED SUCCESSFULLY!")
-            print("=" * 60)
-            print(f"📊 Summary:")
-            print(f"   • {len(products)} products (ice cream, truffles, bars, desserts, halva, sets)")
-            print(f"   • {len(ingredients)} ingredients (cacao, nuts, dairy, coffee, tea, packaging)")
-            print(f"   • 2 admin users (Sah & Ksenia)")
-            print(f"   • {len(products)} product inventory records (empty)")
-            print(f"   • {len(ingredients)} ingredient inventory records (empty)")
-            print("=" * 60)
-            print("💡 Next Steps:")
-            print("   1. Use bot to add initial stock quantities")
-            print("   2. Start recording sales and production")
-            print("   3. Monitor inventory levels")
-            print("=" * 60)
-
-        except Exception as e:
-            print(f"\n❌ ERROR SEEDING DATABASE: {e}")
-            import traceback
-            traceback.print_exc()
-            await session.rollback()
-            raise
+        )
+        .returning(InventoryProduct.id)
+    )
+
+
+def emit_sql() -> str:
+    """
+    The whole seed as a PostgreSQL script with inlined values, for
+    `psql -f` on first boot without starting Python at deploy time
+    """
+    dialect = postgresql.dialect()
+    statements = [
+        str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        for stmt in (admins_insert(), ingredients_insert(), products_insert())
+    ]
+    return "BEGIN;\n\n" + ";\n\n".join(statements) + ";\n\nCOMMIT;\n"
+
+
+async def seed_admins(session: AsyncSession) -> int:
+    """Insert missing admin users; returns the number added"""
+    result = await session.execute(admins_insert())
+    count = len(result.scalars().all())
+
+    logger.info("✅ Created {} admin users", count)
+    return count
+
+
+async def seed_ingredients(session: AsyncSession) -> int:
+    """
+    Insert missing catalog ingredients and their empty inventory; returns
+    the number of ingredients added (0 when already seeded)
+    """
+    result = await session.execute(ingredients_insert())
+    count = len(result.scalars().all())
+
+    logger.info("✅ Created {} ingredients (+ empty inventory)", count)
+    return count
+
+
+async def seed_products(session: AsyncSession) -> int:
+    """Insert missing catalog products and their empty inventory; returns count added"""
+    result = await session.execute(products_insert())
+    count = len(result.scalars().all())
+
+    logger.info("✅ Created {} products (+ empty inventory)", count)
+    return count
+
+
+async def seed_database():
+    """Add initial data to database"""
+    if settings.database_seeded:
+        logger.info("DATABASE_SEEDED is set, skipping seeding")
+        return
+
+    # Three statements (admins, ingredient catalog + inventory, product
+    # catalog + inventory) in one session and one BEGIN ... COMMIT: all of
+    # it lands or none of it does
+    try:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                logger.info("🌱 Starting database seeding...")
+
+                # Idempotent: every insert skips rows that already exist (by
+                # telegram_id / code / sku), so re-runs are cheap no-ops and a
+                # partial seed is completed instead of skipped
+
+                # ====================================
+                # CREATE ADMIN USERS + INGREDIENTS + PRODUCTS WITH EMPTY INVENTORY
+                # (scripts/seed/*.csv; all products are OUR_CHOCOLATE category)
+                # ====================================
+                admin_count = await seed_admins(session)
+                ingredient_count = await seed_ingredients(session)
+                product_count = await seed_products(session)
+
+    except Exception as e:
+        print(f"\n❌ ERROR SEEDING DATABASE: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+    if not (admin_count or ingredient_count or product_count):
+        logger.info("⚠️  Database already seeded. Nothing to add.")
+        return
+
+    # Summary as a single write
+    rule = "=" * 60
+    sys.stdout.write("\n".join([
+        "",
+        rule,
+        "🎉 DATABASE SEEDING COMPLETED SUCCESSFULLY!",
+        rule,
+        "📊 Summary:",
+        f"   • {product_count} products (ice cream, truffles, bars, desserts, halva, sets)",
+        f"   • {ingredient_count} ingredients (cacao, nuts, dairy, coffee, tea, packaging)",
+        f"   • {admin_count} admin users",
+        f"   • {product_count} product inventory records (empty)",
+        f"   • {ingredient_count} ingredient inventory records (empty)",
+        rule,
+        "💡 Next Steps:",
+        "   1. Use bot to add initial stock quantities",
+        "   2. Start recording sales and production",
+        "   3. Monitor inventory levels",
+        "   4. Set DATABASE_SEEDED=true to skip seeding on later runs",
+        rule,
+        "",
+    ]))
 
 
 if __name__ == "__main__":
-    print("\n" + "=" * 60)
-    print("🌱 CHOCODEALERS BOT - DATABASE SEEDING")
-    print("=" * 60)
+    parser = argparse.ArgumentParser(description="Seed the Chocodealers database")
+    parser.add_argument("--verbose", action="store_true", help="print per-step progress")
+    parser.add_argument(
+        "--emit-sql", action="store_true",
+        help="print the seed as SQL (for psql -f) instead of running it",
+    )
+    args = parser.parse_args()
+
+    if args.emit_sql:
+        sys.stdout.write(emit_sql())
+        sys.exit(0)
+
+    # Progress is INFO: shown only with --verbose (CI runs stay quiet)
+    logger.remove()
+    logger.add(sys.stderr, level="INFO" if args.verbose else "WARNING", format="{message}")
+
+    logger.info("🌱 CHOCODEALERS BOT - DATABASE SEEDING")
     asyncio.run(seed_database())